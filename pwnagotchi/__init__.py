@@ -6,6 +6,7 @@ import re
 
 
 from pwnagotchi._version import __version__
+from pwnagotchi import metrics
 
 _name = None
 config = None
@@ -57,52 +58,34 @@ def uptime():
         return int(fp.read().split('.')[0])
 
 
-def mem_usage():
-    with open('/proc/meminfo') as fp:
-        for line in fp:
-            line = line.strip()
-            if line.startswith("MemTotal:"):
-                kb_mem_total = int(line.split()[1])
-            if line.startswith("MemFree:"):
-                kb_mem_free = int(line.split()[1])
-            if line.startswith("Buffers:"):
-                kb_main_buffers = int(line.split()[1])
-            if line.startswith("Cached:"):
-                kb_main_cached = int(line.split()[1])
-        kb_mem_used = kb_mem_total - kb_mem_free - kb_main_cached - kb_main_buffers
-        return round(kb_mem_used / kb_mem_total, 1)
-
-    return 0
+def mem_usage(secs=None):
+    """
+    Returns the memory usage ratio, averaged over the last secs seconds if given
+    """
+    mem = metrics.sampler().get('mem', secs)
+    return round(mem, 1) if mem is not None else 0
 
 
-def _cpu_stat():
+def cpu_load(secs=None):
     """
-    Returns the splitted first line of the /proc/stat file
+    Returns the current cpuload, averaged over the last secs seconds if given
     """
-    with open('/proc/stat', 'rt') as fp:
-        return list(map(int,fp.readline().split()[1:]))
+    load = metrics.sampler().get('cpu', secs)
+    return load if load is not None else 0.0
+
+
+def temperature(celsius=True, secs=None):
+    temp = metrics.sampler().get('temperature', secs)
+    c = int(temp) if temp is not None else 0
+    return c if celsius else ((c * (9 / 5)) + 32)
 
 
-def cpu_load():
+def cpu_freq(secs=None):
     """
-    Returns the current cpuload
+    Returns the cpu0 frequency in KHz, averaged over the last secs seconds if given
     """
-    parts0 = _cpu_stat()
-    time.sleep(0.1)
-    parts1 = _cpu_stat()
-    parts_diff = [p1 - p0 for (p0, p1) in zip(parts0, parts1)]
-    user, nice, sys, idle, iowait, irq, softirq, steal, _guest, _guest_nice = parts_diff
-    idle_sum = idle + iowait
-    non_idle_sum = user + nice + sys + irq + softirq + steal
-    total = idle_sum + non_idle_sum
-    return non_idle_sum / total
-
-
-def temperature(celsius=True):
-    with open('/sys/class/thermal/thermal_zone0/temp', 'rt') as fp:
-        temp = int(fp.read().strip())
-    c = int(temp / 1000)
-    return c if celsius else ((c * (9 / 5)) + 32)
+    freq = metrics.sampler().get('frequency', secs)
+    return int(freq) if freq is not None else 0
 
 
 def shutdown():
@@ -116,6 +99,9 @@ def shutdown():
 
     logging.warning("syncing...")
 
+    from pwnagotchi.ai import checkpoint
+    checkpoint.flush_all(timeout=30)
+
     from pwnagotchi import fs
     for m in fs.mounts:
         m.sync()
@@ -127,6 +113,9 @@ def shutdown():
 def restart(mode):
     logging.warning("restarting in %s mode ...", mode)
 
+    from pwnagotchi.ai import checkpoint
+    checkpoint.flush_all(timeout=30)
+
     if mode == 'AUTO':
         os.system("touch /root/.pwnagotchi-auto")
     else:
@@ -156,6 +145,9 @@ def reboot(mode=None):
 
     logging.warning("syncing...")
 
+    from pwnagotchi.ai import checkpoint
+    checkpoint.flush_all(timeout=30)
+
     from pwnagotchi import fs
     for m in fs.mounts:
         m.sync()
@@ -1,7 +1,6 @@
 import time
 import json
 import os
-import re
 import logging
 import asyncio
 import _thread
@@ -9,14 +8,24 @@ import _thread
 import pwnagotchi
 import pwnagotchi.utils as utils
 import pwnagotchi.plugins as plugins
+import pwnagotchi.ui.textcache as textcache
 from pwnagotchi.ui.web.server import Server
 from pwnagotchi.automata import Automata
 from pwnagotchi.log import LastSession
-from pwnagotchi.bettercap import Client
+from pwnagotchi.bettercap import Client, AsyncClient
+from pwnagotchi.aps import AccessPointIndex, AccessPointSnapshot, EVENTS as INDEX_EVENTS
+from pwnagotchi.handshakes import HandshakeIndex
+import pwnagotchi.handshakes as handshakes
+import pwnagotchi.whitelist as whitelist
+from pwnagotchi.history import InteractionHistory
+from pwnagotchi.scheduler import scheduler_for
+from pwnagotchi.channels import ChannelStats
+from pwnagotchi.dispatch import Dispatcher
 from pwnagotchi.mesh.utils import AsyncAdvertiser
 from pwnagotchi.ai.train import AsyncTrainer
 
 RECOVERY_DATA_FILE = '/root/.pwnagotchi-recovery'
+HISTORY_FILE = '/root/.pwnagotchi-history'
 
 
 class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
@@ -25,13 +34,13 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
                         config['bettercap']['scheme'],
                         config['bettercap']['port'],
                         config['bettercap']['username'],
-                        config['bettercap']['password'])
+                        config['bettercap']['password'],
+                        config['bettercap']['session_max_age'])
         Automata.__init__(self, config, view)
         AsyncAdvertiser.__init__(self, config, view, keypair)
         AsyncTrainer.__init__(self, config)
 
         self._started_at = time.time()
-        self._filter = None if not config['main']['filter'] else re.compile(config['main']['filter'])
         self._current_channel = 0
         self._tot_aps = 0
         self._aps_on_channel = 0
@@ -40,16 +49,27 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         self._view.set_agent(self)
         self._web_ui = Server(self, config['ui'])
 
-        self._access_points = []
+        self._access_points = AccessPointSnapshot()
+        self._ap_index = AccessPointIndex(self._ap_index_max_age())
         self._last_pwnd = None
-        self._history = {}
+        self._history = InteractionHistory(HISTORY_FILE,
+                                           config['main']['history']['max_entries'],
+                                           config['main']['history']['ttl'],
+                                           config['main']['history']['half_life'])
         self._handshakes = {}
+        self._handshake_index = HandshakeIndex()
+        self._scheduler = scheduler_for(config)
+        self._channel_stats = ChannelStats(config)
+        self._dispatcher = Dispatcher(self, config)
         self.last_session = LastSession(self._config)
         self.mode = 'auto'
+        self._aio = None
 
         if not os.path.exists(config['bettercap']['handshakes']):
             os.makedirs(config['bettercap']['handshakes'])
 
+        self._handshake_index.seed_from_files(handshakes.catalog(config['bettercap']['handshakes']).files())
+
         logging.info("%s@%s (v%s)", pwnagotchi.name(), self.fingerprint(), pwnagotchi.__version__)
         for _, plugin in plugins.loaded.items():
             logging.debug("plugin '%s' v%s", plugin.__class__.__name__, plugin.__version__)
@@ -63,6 +83,14 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
     def supported_channels(self):
         return self._supported_channels
 
+    def _ap_index_max_age(self):
+        silenced = [tag for tag in INDEX_EVENTS if tag in self._config['bettercap']['silence']]
+        if silenced:
+            logging.info("%s silenced, access points will be fetched from the session every time",
+                         ', '.join(silenced))
+            return 0
+        return self._config['bettercap']['reconcile_interval']
+
     def setup_events(self):
         logging.info("connecting to %s ...", self.url)
 
@@ -74,12 +102,14 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
 
     def _reset_wifi_settings(self):
         mon_iface = self._config['main']['iface']
-        self.run('set wifi.interface %s' % mon_iface)
-        self.run('set wifi.ap.ttl %d' % self._config['personality']['ap_ttl'])
-        self.run('set wifi.sta.ttl %d' % self._config['personality']['sta_ttl'])
-        self.run('set wifi.rssi.min %d' % self._config['personality']['min_rssi'])
-        self.run('set wifi.handshakes.file %s' % self._config['bettercap']['handshakes'])
-        self.run('set wifi.handshakes.aggregate false')
+        self.run_many([
+            'set wifi.interface %s' % mon_iface,
+            'set wifi.ap.ttl %d' % self._config['personality']['ap_ttl'],
+            'set wifi.sta.ttl %d' % self._config['personality']['sta_ttl'],
+            'set wifi.rssi.min %d' % self._config['personality']['min_rssi'],
+            'set wifi.handshakes.file %s' % self._config['bettercap']['handshakes'],
+            'set wifi.handshakes.aggregate false'
+        ])
 
     def start_monitor_mode(self):
         mon_iface = self._config['main']['iface']
@@ -140,7 +170,7 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         self.next_epoch()
         self.set_ready()
 
-    def recon(self):
+    def _prepare_recon(self):
         recon_time = self._config['personality']['recon_time']
         max_inactive = self._config['personality']['max_inactive_scale']
         recon_mul = self._config['personality']['recon_inactive_multiplier']
@@ -149,50 +179,63 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         if self._epoch.inactive_for >= max_inactive:
             recon_time *= recon_mul
 
+        recon_time = self._channel_stats.recon_time(recon_time)
+        self._channel_stats.on_hop(0)
         self._view.set('channel', '*')
 
         if not channels:
             self._current_channel = 0
             logging.debug("RECON %ds", recon_time)
-            self.run('wifi.recon.channel clear')
-        else:
-            logging.debug("RECON %ds ON CHANNELS %s", recon_time, ','.join(map(str, channels)))
-            try:
-                self.run('wifi.recon.channel %s' % ','.join(map(str, channels)))
-            except Exception as e:
-                logging.exception("Error while setting wifi.recon.channels (%s)", e)
+            return recon_time, 'wifi.recon.channel clear'
+
+        logging.debug("RECON %ds ON CHANNELS %s", recon_time, ','.join(map(str, channels)))
+        return recon_time, 'wifi.recon.channel %s' % ','.join(map(str, channels))
+
+    def recon(self):
+        self._dispatcher.flush(self._current_channel)
+        recon_time, cmd = self._prepare_recon()
+        try:
+            self.run(cmd)
+        except Exception as e:
+            logging.exception("Error while setting wifi.recon.channels (%s)", e)
 
         self.wait_for(recon_time, sleeping=False)
 
-    def _filter_included(self, ap):
-        return self._filter is None or \
-               self._filter.match(ap['hostname']) is not None or \
-               self._filter.match(ap['mac']) is not None
+    def _whitelist(self):
+        # only compiled again if the configuration changed
+        return whitelist.compiled(self._config['main']['whitelist'], self._config['main']['filter'])
 
     def set_access_points(self, aps):
+        if not isinstance(aps, AccessPointSnapshot):
+            aps = AccessPointSnapshot(aps)
         self._access_points = aps
+        self._channel_stats.on_access_points(aps)
         plugins.on('wifi_update', self, aps)
         self._epoch.observe(aps, list(self._peers.values()))
         return self._access_points
 
+    def _filtered_access_points(self):
+        unfiltered = self._ap_index.access_points()
+        plugins.on("unfiltered_ap_list", self, unfiltered)
+        return self._whitelist().filter_aps(unfiltered)
+
+    def _sync_access_points(self, session):
+        # the events keep the index up to date but for the signal strength, only rebuild it
+        # from the session once in a while in case some event got lost
+        if self._ap_index.is_stale():
+            self._ap_index.reconcile(session['wifi']['aps'])
+        else:
+            self._ap_index.refresh_rssi(session['wifi']['aps'])
+
     def get_access_points(self):
-        whitelist = self._config['main']['whitelist']
         aps = []
         try:
-            s = self.session()
-            plugins.on("unfiltered_ap_list", self, s['wifi']['aps'])
-            for ap in s['wifi']['aps']:
-                if ap['encryption'] == '' or ap['encryption'] == 'OPEN':
-                    continue
-                elif ap['hostname'] not in whitelist \
-                        and ap['mac'].lower() not in whitelist \
-                        and ap['mac'][:8].lower() not in whitelist:
-                    if self._filter_included(ap):
-                        aps.append(ap)
+            # the session is cached, the stats fetcher asks for it every second anyway
+            self._sync_access_points(self.session())
+            aps = self._filtered_access_points()
         except Exception as e:
             logging.exception("Error while getting acces points (%s)", e)
 
-        aps.sort(key=lambda ap: ap['channel'])
         return self.set_access_points(aps)
 
     def get_total_aps(self):
@@ -205,34 +248,44 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         return self._current_channel
 
     def get_access_points_by_channel(self):
-        aps = self.get_access_points()
-        channels = self._config['personality']['channels']
-        grouped = {}
-
-        # group by channel
-        for ap in aps:
-            ch = ap['channel']
-            # if we're sticking to a channel, skip anything
-            # which is not on that channel
-            if channels and ch not in channels:
-                continue
-
-            if ch not in grouped:
-                grouped[ch] = [ap]
-            else:
-                grouped[ch].append(ap)
-
-        # sort by more populated channels
-        return sorted(grouped.items(), key=lambda kv: len(kv[1]), reverse=True)
-
-    def _find_ap_sta_in(self, station_mac, ap_mac, session):
-        for ap in session['wifi']['aps']:
-            if ap['mac'] == ap_mac:
-                for sta in ap['clients']:
-                    if sta['mac'] == station_mac:
-                        return (ap, sta)
-                return (ap, {'mac': station_mac, 'vendor': ''})
-        return None
+        return self._scheduler.plan(self, self.get_access_points())
+
+    def _find_ap_sta(self, station_mac, ap_mac):
+        if self._ap_index.is_stale():
+            self._ap_index.reconcile(self.session()['wifi']['aps'])
+        found = self._ap_index.find(station_mac, ap_mac)
+        if found is None:
+            # we might have lost some event, check again with the full session
+            self._ap_index.reconcile(self.session()['wifi']['aps'])
+            found = self._ap_index.find(station_mac, ap_mac)
+        return found
+
+    def next_epoch(self):
+        self._dispatcher.flush(self._current_channel)
+        Automata.next_epoch(self)
+        self._channel_stats.on_epoch()
+        try:
+            self._history.save()
+        except Exception as e:
+            logging.error("error while saving interaction history: %s", e)
+
+        stats = self.rpc_stats()
+        logging.debug("[bettercap] %d round trips for %d commands, avg=%.1fms last=%.1fms",
+                      stats['calls'], stats['commands'], stats['avg_ms'], stats['last_ms'])
+        stats = self._dispatcher.stats()
+        logging.debug("[dispatch] queued=%d sent=%d failed=%d dropped=%d batches=%d throttled=%.1fs",
+                      stats['queued'], stats['sent'], stats['failed'], stats['dropped'], stats['batches'],
+                      stats['throttled_secs'])
+        stats = self.training_stats()
+        logging.debug("[ai] training trained=%d shrunk=%d deferred=%d paused=%d last=%s",
+                      stats['trained'], stats['shrunk'], stats['deferred'], stats['paused'], stats['last_reason'])
+        stats = textcache.cache().stats()
+        logging.debug("[ui] text cache hits=%d misses=%d entries=%d/%d",
+                      stats['hits'], stats['misses'], stats['entries'], stats['size'])
+
+    def _on_miss(self, who):
+        self._channel_stats.on_miss(self._current_channel)
+        Automata._on_miss(self, who)
 
     def _update_uptime(self, s):
         secs = pwnagotchi.uptime()
@@ -240,15 +293,15 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         # self._view.set('epoch', '%04d' % self._epoch.epoch)
 
     def _update_counters(self):
-        self._tot_aps = len(self._access_points)
-        tot_stas = sum(len(ap['clients']) for ap in self._access_points)
+        aps = self._access_points
+        self._tot_aps = len(aps)
+        tot_stas = aps.total_stations
         if self._current_channel == 0:
             self._view.set('aps', '%d' % self._tot_aps)
             self._view.set('sta', '%d' % tot_stas)
         else:
-            self._aps_on_channel = len([ap for ap in self._access_points if ap['channel'] == self._current_channel])
-            stas_on_channel = sum(
-                [len(ap['clients']) for ap in self._access_points if ap['channel'] == self._current_channel])
+            self._aps_on_channel = aps.aps_on(self._current_channel)
+            stas_on_channel = aps.stations_on(self._current_channel)
             self._view.set('aps', '%d (%d)' % (self._aps_on_channel, self._tot_aps))
             self._view.set('sta', '%d (%d)' % (stas_on_channel, tot_stas))
 
@@ -277,17 +330,22 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
 
     def _save_recovery_data(self):
         logging.warning("writing recovery data to %s ...", RECOVERY_DATA_FILE)
+        self._history.save()
         with open(RECOVERY_DATA_FILE, 'w') as fp:
             data = {
                 'started_at': self._started_at,
                 'epoch': self._epoch.epoch,
-                'history': self._history,
                 'handshakes': self._handshakes,
                 'last_pwnd': self._last_pwnd
             }
             json.dump(data, fp)
 
     def _load_recovery_data(self, delete=True, no_exceptions=True):
+        try:
+            self._history.load()
+        except Exception as e:
+            logging.error("error while loading interaction history: %s", e)
+
         try:
             with open(RECOVERY_DATA_FILE, 'rt') as fp:
                 data = json.load(fp)
@@ -295,7 +353,10 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
                 self._started_at = data['started_at']
                 self._epoch.epoch = data['epoch']
                 self._handshakes = data['handshakes']
-                self._history = data['history']
+                self._handshake_index.seed_from_keys(self._handshakes.keys())
+                # older versions stored the whole history here
+                if 'history' in data:
+                    self._history.update(data['history'])
                 self._last_pwnd = data['last_pwnd']
 
                 if delete:
@@ -310,19 +371,26 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         _thread.start_new_thread(self._fetch_stats, ())
 
 
+    def _update_stats(self, s):
+        self._update_uptime(s)
+        self._update_advertisement(s)
+        self._update_peers()
+        self._update_counters()
+        self._update_handshakes(0)
+
     def _fetch_stats(self):
         while True:
-            s = self.session()
-            self._update_uptime(s)
-            self._update_advertisement(s)
-            self._update_peers()
-            self._update_counters()
-            self._update_handshakes(0)
+            self._update_stats(self.session())
             time.sleep(1)
 
     async def _on_event(self, msg):
+        self._handle_event(json.loads(msg))
+
+    def _handle_event(self, jmsg):
         found_handshake = False
-        jmsg = json.loads(msg)
+
+        if self._ap_index.on_event(jmsg):
+            return
 
         if jmsg['tag'] == 'wifi.client.handshake':
             filename = jmsg['data']['file']
@@ -331,8 +399,11 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
             key = "%s -> %s" % (sta_mac, ap_mac)
             if key not in self._handshakes:
                 self._handshakes[key] = jmsg
-                s = self.session()
-                ap_and_station = self._find_ap_sta_in(sta_mac, ap_mac, s)
+                self._handshake_index.add(sta_mac, ap_mac)
+                self._scheduler.on_handshake(ap_mac)
+                ap_and_station = self._find_ap_sta(sta_mac, ap_mac)
+                self._channel_stats.on_handshake(
+                    ap_and_station[0]['channel'] if ap_and_station is not None else self._current_channel)
                 if ap_and_station is None:
                     logging.warning("!!! captured new handshake: %s !!!", key)
                     self._last_pwnd = ap_mac
@@ -382,71 +453,92 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         self.run('%s off; %s on' % (module, module))
 
     def _has_handshake(self, bssid):
-        for key in self._handshakes:
-            if bssid.lower() in key:
-                return True
-        return False
+        return bssid in self._handshake_index
+
+    def can_interact(self, who):
+        """
+        Returns True if an association or deauth with who would go through now, without counting it
+        """
+        return not self._has_handshake(who) and \
+               self._history.can_interact(who, self._config['personality']['max_interactions'])
+
+    def dwell(self, channel, base):
+        """
+        Returns how many seconds to stay on channel instead of base, given how it went there so far
+        """
+        return self._channel_stats.dwell(channel, base)
 
     def _should_interact(self, who):
         if self._has_handshake(who):
             return False
 
-        elif who not in self._history:
-            self._history[who] = 1
-            return True
-
-        else:
-            self._history[who] += 1
-
-        return self._history[who] < self._config['personality']['max_interactions']
+        return self._history.should_interact(who, self._config['personality']['max_interactions'])
 
-    def associate(self, ap, throttle=0):
+    def _begin_assoc(self, ap):
         if self.is_stale():
             logging.debug("recon is stale, skipping assoc(%s)", ap['mac'])
-            return
+            return False
 
         if self._config['personality']['associate'] and self._should_interact(ap['mac']):
             self._view.on_assoc(ap)
+            logging.info("sending association frame to %s (%s %s) on channel %d [%d clients], %d dBm...",
+                ap['hostname'], ap['mac'], ap['vendor'], ap['channel'], len(ap['clients']), ap['rssi'])
+            return True
 
-            try:
-                logging.info("sending association frame to %s (%s %s) on channel %d [%d clients], %d dBm...",
-                    ap['hostname'], ap['mac'], ap['vendor'], ap['channel'], len(ap['clients']), ap['rssi'])
-                self.run('wifi.assoc %s' % ap['mac'])
-                self._epoch.track(assoc=True)
-            except Exception as e:
-                self._on_error(ap['mac'], e)
+        return False
 
-            plugins.on('association', self, ap)
+    def _end_assoc(self, ap, error=None):
+        if error is None:
+            self._epoch.track(assoc=True)
+            self._scheduler.on_attack(ap['mac'])
+            self._channel_stats.on_response(ap['channel'])
+        else:
+            self._on_error(ap['mac'], error)
+
+    def associate(self, ap, throttle=0):
+        if self._begin_assoc(ap):
+            ready = self._dispatcher.submit(ap['channel'], 'wifi.assoc %s' % ap['mac'],
+                                            lambda error: self._end_assoc(ap, error),
+                                            lambda: plugins.on('association', self, ap))
+            if ready or throttle > 0:
+                self._dispatcher.flush(self._current_channel)
             if throttle > 0:
                 time.sleep(throttle)
             self._view.on_normal()
 
-    def deauth(self, ap, sta, throttle=0):
+    def _begin_deauth(self, ap, sta):
         if self.is_stale():
             logging.debug("recon is stale, skipping deauth(%s)", sta['mac'])
-            return
+            return False
 
         if self._config['personality']['deauth'] and self._should_interact(sta['mac']):
             self._view.on_deauth(sta)
+            logging.info("deauthing %s (%s) from %s (%s %s) on channel %d, %d dBm ...",
+                sta['mac'], sta['vendor'], ap['hostname'], ap['mac'], ap['vendor'], ap['channel'], ap['rssi'])
+            return True
 
-            try:
-                logging.info("deauthing %s (%s) from %s (%s %s) on channel %d, %d dBm ...",
-                    sta['mac'], sta['vendor'], ap['hostname'], ap['mac'], ap['vendor'], ap['channel'], ap['rssi'])
-                self.run('wifi.deauth %s' % sta['mac'])
-                self._epoch.track(deauth=True)
-            except Exception as e:
-                self._on_error(sta['mac'], e)
+        return False
+
+    def _end_deauth(self, ap, sta, error=None):
+        if error is None:
+            self._epoch.track(deauth=True)
+            self._scheduler.on_attack(ap['mac'])
+            self._channel_stats.on_response(ap['channel'])
+        else:
+            self._on_error(sta['mac'], error)
 
-            plugins.on('deauthentication', self, ap, sta)
+    def deauth(self, ap, sta, throttle=0):
+        if self._begin_deauth(ap, sta):
+            ready = self._dispatcher.submit(ap['channel'], 'wifi.deauth %s' % sta['mac'],
+                                            lambda error: self._end_deauth(ap, sta, error),
+                                            lambda: plugins.on('deauthentication', self, ap, sta))
+            if ready or throttle > 0:
+                self._dispatcher.flush(self._current_channel)
             if throttle > 0:
                 time.sleep(throttle)
             self._view.on_normal()
 
-    def set_channel(self, channel, verbose=True):
-        if self.is_stale():
-            logging.debug("recon is stale, skipping set_channel(%d)", channel)
-            return
-
+    def _hop_wait(self, verbose):
         # if in the previous loop no client stations has been deauthenticated
         # and only association frames have been sent, we don't need to wait
         # very long before switching channel as we don't have to wait for
@@ -457,22 +549,157 @@ class Agent(Client, Automata, AsyncAdvertiser, AsyncTrainer):
         elif self._epoch.did_associate:
             wait = self._config['personality']['min_recon_time']
 
+        if self._current_channel != 0 and wait > 0:
+            # spend more time where we historically got more out of it
+            wait = self.dwell(self._current_channel, wait)
+            if verbose:
+                logging.info("waiting for %ds on channel %d ...", wait, self._current_channel)
+            else:
+                logging.debug("waiting for %ds on channel %d ...", wait, self._current_channel)
+            return wait
+
+        return 0
+
+    def _on_channel_set(self, channel):
+        self._current_channel = channel
+        self._channel_stats.on_hop(channel)
+        self._epoch.track(hop=True)
+        self._view.set('channel', '%d' % channel)
+
+        plugins.on('channel_hop', self, channel)
+
+    def set_channel(self, channel, verbose=True):
+        if self.is_stale():
+            logging.debug("recon is stale, skipping set_channel(%d)", channel)
+            return
+
         if channel != self._current_channel:
-            if self._current_channel != 0 and wait > 0:
-                if verbose:
-                    logging.info("waiting for %ds on channel %d ...", wait, self._current_channel)
-                else:
-                    logging.debug("waiting for %ds on channel %d ...", wait, self._current_channel)
+            # send whatever is still queued for this channel before waiting on it
+            self._dispatcher.flush(self._current_channel)
+            wait = self._hop_wait(verbose)
+            if wait > 0:
                 self.wait_for(wait)
             if verbose and self._epoch.any_activity:
                 logging.info("CHANNEL %d", channel)
             try:
                 self.run('wifi.recon.channel %d' % channel)
-                self._current_channel = channel
-                self._epoch.track(hop=True)
-                self._view.set('channel', '%d' % channel)
+                self._on_channel_set(channel)
+            except Exception as e:
+                logging.error("Error while setting channel (%s)", e)
+
+    # asyncio flavour of the main loop primitives, see main.asyncio
 
-                plugins.on('channel_hop', self, channel)
+    def aio(self):
+        if self._aio is None:
+            self._aio = AsyncClient(self)
+        return self._aio
 
+    # the stats update (grid advertisement, view and display), the handshake lookups (session
+    # fetches) and the epoch bookkeeping (history file) all block, they run on the default
+    # executor so that the loop keeps going while they do
+
+    async def _fetch_stats_async(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self._update_stats, await self.aio().session())
+            except Exception as e:
+                logging.debug("error while fetching stats (%s)", e)
+            await asyncio.sleep(1)
+
+    async def _poll_events_async(self):
+        loop = asyncio.get_event_loop()
+        await self.aio().run('events.clear')
+        async for jmsg in self.aio().events():
+            try:
+                # one at a time, events must be handled in order
+                await loop.run_in_executor(None, self._handle_event, jmsg)
+            except Exception as ex:
+                logging.debug("Error while handling event (%s)", ex)
+
+    async def start_async(self):
+        loop = asyncio.get_event_loop()
+        self.start_ai()
+        await loop.run_in_executor(None, self._wait_bettercap)
+        await loop.run_in_executor(None, self.setup_events)
+        self.set_starting()
+        await loop.run_in_executor(None, self.start_monitor_mode)
+        await loop.run_in_executor(None, self._load_recovery_data)
+        loop.create_task(self._poll_events_async())
+        loop.create_task(self._fetch_stats_async())
+        # print initial stats
+        await self.next_epoch_async()
+        self.set_ready()
+
+    async def next_epoch_async(self):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.next_epoch)
+
+    async def wait_for_async(self, t, sleeping=True):
+        plugins.on('sleep' if sleeping else 'wait', self, t)
+        await self._view.wait_async(t, sleeping)
+        self._epoch.track(sleep=True, inc=t)
+
+    async def _flush_async(self):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._dispatcher.flush, self._current_channel)
+
+    async def recon_async(self):
+        await self._flush_async()
+        recon_time, cmd = self._prepare_recon()
+        try:
+            await self.aio().run(cmd)
+        except Exception as e:
+            logging.exception("Error while setting wifi.recon.channels (%s)", e)
+
+        await self.wait_for_async(recon_time, sleeping=False)
+
+    async def get_access_points_by_channel_async(self):
+        aps = []
+        try:
+            self._sync_access_points(await self.aio().session())
+            aps = self._filtered_access_points()
+        except Exception as e:
+            logging.exception("Error while getting acces points (%s)", e)
+
+        return self._scheduler.plan(self, self.set_access_points(aps))
+
+    async def set_channel_async(self, channel, verbose=True):
+        if self.is_stale():
+            logging.debug("recon is stale, skipping set_channel(%d)", channel)
+            return
+
+        if channel != self._current_channel:
+            await self._flush_async()
+            wait = self._hop_wait(verbose)
+            if wait > 0:
+                await self.wait_for_async(wait)
+            if verbose and self._epoch.any_activity:
+                logging.info("CHANNEL %d", channel)
+            try:
+                await self.aio().run('wifi.recon.channel %d' % channel)
+                self._on_channel_set(channel)
             except Exception as e:
                 logging.error("Error while setting channel (%s)", e)
+
+    async def associate_async(self, ap, throttle=0):
+        if self._begin_assoc(ap):
+            ready = self._dispatcher.submit(ap['channel'], 'wifi.assoc %s' % ap['mac'],
+                                            lambda error: self._end_assoc(ap, error),
+                                            lambda: plugins.on('association', self, ap))
+            if ready or throttle > 0:
+                await self._flush_async()
+            if throttle > 0:
+                await asyncio.sleep(throttle)
+            self._view.on_normal()
+
+    async def deauth_async(self, ap, sta, throttle=0):
+        if self._begin_deauth(ap, sta):
+            ready = self._dispatcher.submit(ap['channel'], 'wifi.deauth %s' % sta['mac'],
+                                            lambda error: self._end_deauth(ap, sta, error),
+                                            lambda: plugins.on('deauthentication', self, ap, sta))
+            if ready or throttle > 0:
+                await self._flush_async()
+            if throttle > 0:
+                await asyncio.sleep(throttle)
+            self._view.on_normal()
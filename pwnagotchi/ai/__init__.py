@@ -42,12 +42,20 @@ def load(config, agent, epoch, from_disk=True):
         a2c = A2C(MlpLstmPolicy, env, **config['params'])
         logging.debug("[ai] A2C created in %.2fs" % (time.time() - start))
 
+        loaded = False
         if from_disk and os.path.exists(config['path']):
             logging.info("[ai] loading %s ..." % config['path'])
             start = time.time()
-            a2c.load(config['path'], env)
-            logging.debug("[ai] A2C loaded in %.2fs" % (time.time() - start))
-        else:
+            try:
+                # load() is a class method returning a new model, we want the weights in this one
+                a2c.load_parameters(config['path'])
+                loaded = True
+                logging.debug("[ai] A2C loaded in %.2fs" % (time.time() - start))
+            except Exception as e:
+                # the action space might have changed since it was saved (different channels for instance)
+                logging.warning("[ai] could not load %s (%s), starting with a new model" % (config['path'], e))
+
+        if not loaded:
             logging.info("[ai] model created:")
             for key, value in config['params'].items():
                 logging.info("      %s: %s" % (key, value))
@@ -60,3 +68,43 @@ def load(config, agent, epoch, from_disk=True):
 
     logging.warning("[ai] AI not loaded!")
     return False
+
+
+def load_inference(config, agent, epoch):
+    """
+    Loads the numpy only policy exported from the model at ai.path, without importing tensorflow
+    """
+    config = config['ai']
+    if not config['enabled']:
+        logging.info("ai disabled")
+        return False
+
+    try:
+        begin = time.time()
+
+        import pwnagotchi.ai.inference as inference
+
+        npz_path = inference.inference_path(config['path'])
+        if inference.needs_export(config['path'], npz_path):
+            logging.info("[ai] exporting %s for inference ..." % config['path'])
+            inference.export(config['path'], npz_path)
+
+        if not os.path.exists(npz_path):
+            logging.warning("[ai] %s not found, no trained model to run inference with" % npz_path)
+            return False
+
+        start = time.time()
+        import pwnagotchi.ai.gym as wrappers
+        logging.debug("[ai] gym wrapper imported in %.2fs" % (time.time() - start))
+
+        env = wrappers.Environment(agent, epoch)
+        policy = inference.Policy(npz_path, env.action_space.nvec)
+
+        logging.debug("[ai] total inference loading time is %.2fs" % (time.time() - begin))
+
+        return inference.Model(env, policy)
+    except Exception as e:
+        logging.exception("error while loading the inference model (%s)", e)
+
+    logging.warning("[ai] inference model not loaded!")
+    return False
@@ -0,0 +1,159 @@
+import os
+import time
+import shutil
+import atexit
+import logging
+import threading
+import weakref
+
+# every manager, so that they can all be flushed before shutting down or rebooting
+_managers = weakref.WeakSet()
+
+
+def flush_all(timeout=None):
+    for manager in list(_managers):
+        manager.flush(timeout)
+
+
+atexit.register(flush_all)
+
+
+def rotate(path, generations):
+    """
+    Shifts path.1 ... path.(generations - 1) one generation up and keeps a copy of path as path.1,
+    path itself is left in place so that it can be atomically replaced
+    """
+    if generations <= 0 or not os.path.exists(path):
+        return
+
+    for gen in range(generations - 1, 0, -1):
+        older = "%s.%d" % (path, gen)
+        if os.path.exists(older):
+            os.replace(older, "%s.%d" % (path, gen + 1))
+
+    latest = "%s.1" % path
+    if os.path.exists(latest):
+        os.remove(latest)
+    try:
+        os.link(path, latest)
+    except OSError:
+        shutil.copy2(path, latest)
+
+
+def model_writer(model, path, generations=0):
+    """
+    Snapshots the model parameters in memory and returns the function writing them to path, so that
+    the slow part can happen on another thread while the model keeps training
+    """
+    from pwnagotchi.ai.inference import save_parameters, inference_path
+
+    # stable_baselines save() gets the parameters out of the session and hands them over
+    # to _save_to_file, which does the actual (slow) writing: just capture what it gets
+    captured = {}
+
+    def capture(save_path, **kwargs):
+        captured.update(kwargs)
+
+    model._save_to_file = capture
+    try:
+        model.save(path)
+    finally:
+        del model._save_to_file
+
+    save_to_file = type(model)._save_to_file
+
+    def write():
+        start = time.time()
+        temp = "%s.tmp" % path
+        save_to_file(temp, **captured)
+        rotate(path, generations)
+        os.replace(temp, path)
+        save_parameters(captured['params'], inference_path(path))
+        logging.info("[ai] model saved to %s in %.2fs" % (path, time.time() - start))
+
+    return write
+
+
+class CheckpointManager(object):
+    """
+    Runs the writes of the model and statistics on a background thread. Every write has a key,
+    a newer write for the same key replaces the pending one, and can be delayed to batch the
+    ones that would happen in the meantime.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        # serializes the writes of the worker and of flush()
+        self._write_lock = threading.Lock()
+        # key -> [due time, function]
+        self._pending = {}
+        self._thread = threading.Thread(target=self._worker, name='checkpoints', daemon=True)
+        self._thread.start()
+        _managers.add(self)
+
+    def submit(self, key, fn, delay=0):
+        with self._cond:
+            due = time.time() + delay
+            if key in self._pending:
+                # keep the earliest deadline so that writes can't be postponed forever
+                due = min(due, self._pending[key][0])
+            self._pending[key] = [due, fn]
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _pop(self, now=None):
+        """
+        Returns the (key, fn) of the first job due by now, all of them if now is None
+        """
+        for key, (due, fn) in sorted(self._pending.items(), key=lambda kv: kv[1][0]):
+            if now is None or due <= now:
+                del self._pending[key]
+                return key, fn
+        return None
+
+    def _run(self, key, fn):
+        try:
+            fn()
+        except Exception as e:
+            logging.exception("[ai] error while writing %s checkpoint (%s)", key, e)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.time()
+                    due = min((due for due, _ in self._pending.values()), default=None)
+                    # take the write lock before the job leaves the pending list, so that a
+                    # flush can't return while this job is still being written
+                    if due is not None and due <= now and self._write_lock.acquire(blocking=False):
+                        job = self._pop(now)
+                        break
+                    # if the lock is busy, flush() is writing and will notify us when done
+                    self._cond.wait(None if due is None else max(due - now, 0.1))
+
+            try:
+                self._run(*job)
+            finally:
+                self._write_lock.release()
+
+    def flush(self, timeout=None):
+        """
+        Writes everything that's pending right now, from the calling thread
+        """
+        if not self._write_lock.acquire(timeout=-1 if timeout is None else timeout):
+            logging.warning("[ai] timeout while waiting for checkpoints to be written")
+            return
+        try:
+            while True:
+                with self._cond:
+                    job = self._pop()
+                if job is None:
+                    break
+                self._run(*job)
+        finally:
+            self._write_lock.release()
+            with self._cond:
+                self._cond.notify()
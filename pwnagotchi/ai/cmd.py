@@ -0,0 +1,83 @@
+# Handles the ai commandline stuff
+
+import logging
+
+import pwnagotchi.ai.replay as replay
+
+
+def add_parsers(parser, subparsers):
+    """
+    Adds the ai subcommand to a given argparse.ArgumentParser
+    """
+    ## pwnagotchi ai
+    parser_ai = subparsers.add_parser('ai')
+    ai_subparsers = parser_ai.add_subparsers(dest='aicmd')
+
+    ## pwnagotchi ai train-offline
+    parser_ai_train = ai_subparsers.add_parser('train-offline',
+                                            help='Train the model on the policies of the best epochs in the replay logs')
+    parser_ai_train.add_argument('logs', type=str, nargs='*',
+                                 help='Replay logs to train from (default: ai.replay.path and its rotations)')
+    parser_ai_train.add_argument('-t', '--timesteps', type=int, default=0,
+                                 help='Number of steps to learn for (default: one pass over the logs)')
+    parser_ai_train.add_argument('-o', '--output', type=str, default=None,
+                                 help='Where to save the trained model (default: ai.path)')
+    parser_ai_train.add_argument('-w', '--workers', type=int, default=0,
+                                 help='Number of environment processes (default: ai.offline.workers)')
+
+    ## pwnagotchi ai train-sim
+    parser_ai_sim = ai_subparsers.add_parser('train-sim', help='Train the model on the WiFi simulator')
+    parser_ai_sim.add_argument('-t', '--timesteps', type=int, default=10000, help='Number of steps to learn for')
+    parser_ai_sim.add_argument('-o', '--output', type=str, default=None,
+                               help='Where to save the trained model (default: ai.path)')
+    parser_ai_sim.add_argument('-w', '--workers', type=int, default=0,
+                               help='Number of environment processes (default: ai.offline.workers)')
+    parser_ai_sim.add_argument('-s', '--seed', type=int, default=None, help='Seed of the simulated worlds')
+
+    return parser
+
+
+def used_ai_cmd(args):
+    """
+    Checks if the ai subcommand was used
+    """
+    return hasattr(args, 'aicmd')
+
+
+def handle_cmd(args, config):
+    """
+    Parses the arguments and does the thing the user wants
+    """
+    if args.aicmd == 'train-offline':
+        return train_offline(args, config)
+    elif args.aicmd == 'train-sim':
+        return train_sim(args, config)
+
+    raise NotImplementedError()
+
+
+def train_offline(args, config):
+    """
+    Trains the model from the transitions logged by the unit
+    """
+    from pwnagotchi.ai.offline import train
+
+    logs = args.logs or replay.files(config['ai']['replay']['path'])
+    if not logs:
+        logging.error('No replay logs found, enable ai.replay on the unit and copy them here.')
+        return 1
+
+    return train(config, logs, args.timesteps, args.output, _workers(args, config))
+
+
+def train_sim(args, config):
+    """
+    Trains the model on simulated epochs
+    """
+    from pwnagotchi.ai.offline import simulate
+
+    return simulate(config, args.timesteps, args.output, _workers(args, config), args.seed)
+
+
+def _workers(args, config):
+    return max(1, args.workers or config['ai']['offline']['workers'])
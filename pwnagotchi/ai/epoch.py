@@ -1,16 +1,23 @@
 import time
 import threading
 import logging
+import numpy as np
 
 import pwnagotchi
 import pwnagotchi.utils as utils
 import pwnagotchi.mesh.wifi as wifi
 
+from pwnagotchi.aps import AccessPointSnapshot
 from pwnagotchi.ai.reward import RewardFunction
 
 
 class Epoch(object):
-    def __init__(self, config):
+    # level of the summary logged at the end of every epoch
+    LOG_LEVEL = logging.INFO
+
+    def __init__(self, config, clock=time.time):
+        # where the time comes from, the simulator has its own
+        self._clock = clock
         self.epoch = 0
         self.config = config
         # how many consecutive epochs with no activity
@@ -50,17 +57,20 @@ class Epoch(object):
         # any activity at all during this epoch?
         self.any_activity = False
         # when the current epoch started
-        self.epoch_started = time.time()
+        self.epoch_started = self._clock()
         # last epoch duration
         self.epoch_duration = 0
         # https://www.metageek.com/training/resources/why-channels-1-6-11.html
         self.non_overlapping_channels = {1: 0, 6: 0, 11: 0}
-        # observation vectors
+        # observation vectors, updated in place by observe and copied to the
+        # second set of buffers when another thread reads the epoch data
         self._observation = {
-            'aps_histogram': [0.0] * wifi.NumChannels,
-            'sta_histogram': [0.0] * wifi.NumChannels,
-            'peers_histogram': [0.0] * wifi.NumChannels
+            'aps_histogram': np.zeros(wifi.NumChannels, dtype=np.float32),
+            'sta_histogram': np.zeros(wifi.NumChannels, dtype=np.float32),
+            'peers_histogram': np.zeros(wifi.NumChannels, dtype=np.float32)
         }
+        self._observation_out = {name: np.zeros_like(hist) for name, hist in self._observation.items()}
+        self._observation_lock = threading.Lock()
         self._observation_ready = threading.Event()
         self._epoch_data = {}
         self._epoch_data_ready = threading.Event()
@@ -72,12 +82,21 @@ class Epoch(object):
         #    self._observation_ready.clear()
         self._epoch_data_ready.wait(timeout)
         self._epoch_data_ready.clear()
-        return self._epoch_data if with_observation is False else {**self._observation, **self._epoch_data}
+        if with_observation is False:
+            return self._epoch_data
+
+        with self._observation_lock:
+            for name, hist in self._observation.items():
+                np.copyto(self._observation_out[name], hist)
+        return {**self._observation_out, **self._epoch_data}
 
     def data(self):
         return self._epoch_data
 
     def observe(self, aps, peers):
+        if not isinstance(aps, AccessPointSnapshot):
+            aps = AccessPointSnapshot(aps)
+
         num_aps = len(aps)
         if num_aps == 0:
             self.blind_for += 1
@@ -93,38 +112,47 @@ class Epoch(object):
         self.avg_bond_factor = self.tot_bond_factor / num_peers
 
         num_aps = len(aps) + 1e-10
-        num_sta = sum(len(ap['clients']) for ap in aps) + 1e-10
-        aps_per_chan = [0.0] * wifi.NumChannels
-        sta_per_chan = [0.0] * wifi.NumChannels
-        peers_per_chan = [0.0] * wifi.NumChannels
-
-        for ap in aps:
-            ch_idx = ap['channel'] - 1
-            try:
-                aps_per_chan[ch_idx] += 1.0
-                sta_per_chan[ch_idx] += len(ap['clients'])
-            except IndexError:
-                logging.error("got data on channel %d, we can store %d channels" % (ap['channel'], wifi.NumChannels))
-
-        for peer in peers:
-            try:
-                peers_per_chan[peer.last_channel - 1] += 1.0
-            except IndexError:
-                logging.error(
-                    "got peer data on channel %d, we can store %d channels" % (peer.last_channel, wifi.NumChannels))
-
-        # normalize
-        aps_per_chan = [e / num_aps for e in aps_per_chan]
-        sta_per_chan = [e / num_sta for e in sta_per_chan]
-        peers_per_chan = [e / num_peers for e in peers_per_chan]
+        num_sta = aps.total_stations + 1e-10
+
+        aps_per_chan = self._observation['aps_histogram']
+        sta_per_chan = self._observation['sta_histogram']
+        peers_per_chan = self._observation['peers_histogram']
+
+        chans = np.fromiter(aps.by_channel.keys(), dtype=np.int32, count=len(aps.by_channel))
+        aps_count = np.fromiter((len(group) for group in aps.by_channel.values()), dtype=np.float32,
+                                count=len(chans))
+        sta_count = np.fromiter((aps.stations_on(ch) for ch in aps.by_channel), dtype=np.float32,
+                                count=len(chans))
+        valid = (chans >= 1) & (chans <= wifi.NumChannels)
+        for ch in chans[~valid]:
+            logging.error("got data on channel %d, we can store %d channels" % (ch, wifi.NumChannels))
+
+        peer_chans = np.fromiter((peer.last_channel for peer in peers), dtype=np.int32, count=len(peers))
+        peer_valid = (peer_chans >= 1) & (peer_chans <= wifi.NumChannels)
+        for ch in peer_chans[~peer_valid]:
+            logging.error("got peer data on channel %d, we can store %d channels" % (ch, wifi.NumChannels))
+
+        with self._observation_lock:
+            aps_per_chan.fill(0.0)
+            sta_per_chan.fill(0.0)
+            peers_per_chan.fill(0.0)
+
+            # channels are unique in the snapshot, peers need to be accumulated
+            aps_per_chan[chans[valid] - 1] = aps_count[valid]
+            sta_per_chan[chans[valid] - 1] = sta_count[valid]
+            np.add.at(peers_per_chan, peer_chans[peer_valid] - 1, 1.0)
+
+            # normalize
+            aps_per_chan /= num_aps
+            sta_per_chan /= num_sta
+            peers_per_chan /= num_peers
 
-        self._observation = {
-            'aps_histogram': aps_per_chan,
-            'sta_histogram': sta_per_chan,
-            'peers_histogram': peers_per_chan
-        }
         self._observation_ready.set()
 
+    def _system_metrics(self):
+        # averaged by the sampler over the whole epoch, doesn't block
+        return pwnagotchi.cpu_load(secs=self.epoch_duration), pwnagotchi.mem_usage(), pwnagotchi.temperature()
+
     def track(self, deauth=False, assoc=False, handshake=False, hop=False, sleep=False, miss=False, inc=1):
         if deauth:
             self.num_deauths += inc
@@ -176,12 +204,9 @@ class Epoch(object):
             self.sad_for = 0
             self.bored_for = 0
 
-        now = time.time()
-        cpu = pwnagotchi.cpu_load()
-        mem = pwnagotchi.mem_usage()
-        temp = pwnagotchi.temperature()
-
+        now = self._clock()
         self.epoch_duration = now - self.epoch_started
+        cpu, mem, temp = self._system_metrics()
 
         # cache the state of this epoch for other threads to read
         self._epoch_data = {
@@ -208,29 +233,30 @@ class Epoch(object):
         self._epoch_data['reward'] = self._reward(self.epoch + 1, self._epoch_data)
         self._epoch_data_ready.set()
 
-        logging.info("[epoch %d] duration=%s slept_for=%s blind=%d sad=%d bored=%d inactive=%d active=%d peers=%d tot_bond=%.2f "
-                     "avg_bond=%.2f hops=%d missed=%d deauths=%d assocs=%d handshakes=%d cpu=%d%% mem=%d%% "
-                     "temperature=%dC reward=%s" % (
-                         self.epoch,
-                         utils.secs_to_hhmmss(self.epoch_duration),
-                         utils.secs_to_hhmmss(self.num_slept),
-                         self.blind_for,
-                         self.sad_for,
-                         self.bored_for,
-                         self.inactive_for,
-                         self.active_for,
-                         self.num_peers,
-                         self.tot_bond_factor,
-                         self.avg_bond_factor,
-                         self.num_hops,
-                         self.num_missed,
-                         self.num_deauths,
-                         self.num_assocs,
-                         self.num_shakes,
-                         cpu * 100,
-                         mem * 100,
-                         temp,
-                         self._epoch_data['reward']))
+        logging.log(self.LOG_LEVEL,
+                    "[epoch %d] duration=%s slept_for=%s blind=%d sad=%d bored=%d inactive=%d active=%d peers=%d tot_bond=%.2f "
+                    "avg_bond=%.2f hops=%d missed=%d deauths=%d assocs=%d handshakes=%d cpu=%d%% mem=%d%% "
+                    "temperature=%dC reward=%s",
+                    self.epoch,
+                    utils.secs_to_hhmmss(self.epoch_duration),
+                    utils.secs_to_hhmmss(self.num_slept),
+                    self.blind_for,
+                    self.sad_for,
+                    self.bored_for,
+                    self.inactive_for,
+                    self.active_for,
+                    self.num_peers,
+                    self.tot_bond_factor,
+                    self.avg_bond_factor,
+                    self.num_hops,
+                    self.num_missed,
+                    self.num_deauths,
+                    self.num_assocs,
+                    self.num_shakes,
+                    cpu * 100,
+                    mem * 100,
+                    temp,
+                    self._epoch_data['reward'])
 
         self.epoch += 1
         self.epoch_started = now
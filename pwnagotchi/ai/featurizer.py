@@ -37,30 +37,46 @@ def describe(extended=False):
                             1)
 
 
-def featurize(state, step):
+# duration, inactive, active, missed, hops, deauths, assocs, handshakes
+NUM_SCALARS = 8
+
+
+def featurize(state, step, out=None):
+    """
+    Writes the observation vector of state into out, which is (re)allocated only
+    if missing or of the wrong size, and returns it
+    """
+    hist_size = len(state['aps_histogram'])
+    size = 3 * hist_size + NUM_SCALARS
+    if out is None or out.shape != (size,):
+        out = np.empty(size, dtype=np.float32)
+
     tot_epochs = step + 1e-10
     tot_interactions = (state['num_deauths'] + state['num_associations']) + 1e-10
-    return np.concatenate((
-        # aps per channel
-        state['aps_histogram'],
-        # clients per channel
-        state['sta_histogram'],
-        # peers per channel
-        state['peers_histogram'],
-        # duration
-        [np.clip(state['duration_secs'] / MAX_EPOCH_DURATION, 0.0, 1.0)],
-        # inactive
-        [state['inactive_for_epochs'] / tot_epochs],
-        # active
-        [state['active_for_epochs'] / tot_epochs],
-        # missed
-        [state['missed_interactions'] / tot_interactions],
-        # hops
-        [state['num_hops'] / wifi.NumChannels],
-        # deauths
-        [state['num_deauths'] / tot_interactions],
-        # assocs
-        [state['num_associations'] / tot_interactions],
-        # handshakes
-        [state['num_handshakes'] / tot_interactions],
-    ))
+
+    # aps per channel
+    out[0:hist_size] = state['aps_histogram']
+    # clients per channel
+    out[hist_size:2 * hist_size] = state['sta_histogram']
+    # peers per channel
+    out[2 * hist_size:3 * hist_size] = state['peers_histogram']
+
+    scalars = out[3 * hist_size:]
+    # duration
+    scalars[0] = min(max(state['duration_secs'] / MAX_EPOCH_DURATION, 0.0), 1.0)
+    # inactive
+    scalars[1] = state['inactive_for_epochs'] / tot_epochs
+    # active
+    scalars[2] = state['active_for_epochs'] / tot_epochs
+    # missed
+    scalars[3] = state['missed_interactions'] / tot_interactions
+    # hops
+    scalars[4] = state['num_hops'] / wifi.NumChannels
+    # deauths
+    scalars[5] = state['num_deauths'] / tot_interactions
+    # assocs
+    scalars[6] = state['num_associations'] / tot_interactions
+    # handshakes
+    scalars[7] = state['num_handshakes'] / tot_interactions
+
+    return out
@@ -39,9 +39,11 @@ class Environment(gym.Env):
         self._extended_spectrum = any(ch > 140 for ch in self._supported_channels)
         self._histogram_size, self._observation_shape = featurizer.describe(self._extended_spectrum)
 
+        # params is shared by every instance, don't add the channels twice
+        known = set(p.name for p in Environment.params)
         Environment.params += [
             Parameter('_channel_%d' % ch, min_value=0, max_value=1, meta=ch + 1) for ch in
-            range(self._histogram_size) if ch + 1 in self._supported_channels
+            range(self._histogram_size) if ch + 1 in self._supported_channels and '_channel_%d' % ch not in known
         ]
 
         self.last = {
@@ -107,19 +109,26 @@ class Environment(gym.Env):
 
         self.last['reward'] = state['reward']
         self.last['state'] = state
-        self.last['state_v'] = featurizer.featurize(state, self._epoch_num)
+        if self.last['state_v'] is not None:
+            # the observation the policy was chosen for, before it gets overwritten
+            self._agent.on_ai_transition(self.last['state_v'], policy, state['reward'], self.action_space.nvec)
+        self.last['state_v'] = featurizer.featurize(state, self._epoch_num, out=self.last['state_v'])
 
         self._agent.on_ai_step()
 
-        return self.last['state_v'], self.last['reward'], not self._agent.is_training(), {}
+        return self._observation(), self.last['reward'], not self._agent.is_training(), {}
 
     def reset(self):
         # logging.info("[ai] resetting environment ...")
         self._epoch_num = 0
         state = self._next_epoch()
         self.last['state'] = state
-        self.last['state_v'] = featurizer.featurize(state, 1)
-        return self.last['state_v']
+        self.last['state_v'] = featurizer.featurize(state, 1, out=self.last['state_v'])
+        return self._observation()
+
+    def _observation(self):
+        # a view with the declared shape, subprocess vectorized environments stack them as they are
+        return self.last['state_v'].reshape(self._observation_shape)
 
     def _render_histogram(self, hist):
         for ch in range(self._histogram_size):
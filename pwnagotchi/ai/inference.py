@@ -0,0 +1,179 @@
+import os
+import io
+import json
+import time
+import pickle
+import logging
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+# variables of the stable_baselines MlpLstmPolicy we need for inference,
+# pi_fc* are the shared feed forward layers before the LSTM cell
+LSTM_PREFIX = 'model/lstm1/'
+PI_PREFIX = 'model/pi/'
+FC_FORMAT = 'model/pi_fc%d/'
+
+
+def inference_path(nn_path):
+    return "%s.npz" % os.path.splitext(nn_path)[0]
+
+
+class _Stub(object):
+    """
+    Stands for whatever class the legacy pickles refer to outside of numpy and the builtins
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __setstate__(self, state):
+        pass
+
+
+class _ParametersUnpickler(pickle.Unpickler):
+    """
+    Unpickles the legacy models without importing stable_baselines, gym or tensorflow: the data
+    part refers to the policy class and the spaces, we only need the numpy parameters
+    """
+    SAFE_MODULES = ('builtins', 'copyreg', 'collections', '_codecs', 'numpy')
+
+    def find_class(self, module, name):
+        if module.split('.')[0] in self.SAFE_MODULES:
+            return super(_ParametersUnpickler, self).find_class(module, name)
+        return _Stub
+
+
+def _load_parameters(nn_path):
+    """
+    Reads the parameters of a model saved by stable_baselines without importing it (or tensorflow)
+    """
+    if zipfile.is_zipfile(nn_path):
+        with zipfile.ZipFile(nn_path, 'r') as archive:
+            names = json.loads(archive.read('parameter_list').decode())
+            arrays = np.load(io.BytesIO(archive.read('parameters')))
+            return OrderedDict((name, arrays[name]) for name in names)
+
+    # legacy cloudpickle format, a (data, params) tuple
+    with open(nn_path, 'rb') as fp:
+        _, params = _ParametersUnpickler(fp).load()
+    if isinstance(params, dict):
+        return OrderedDict(params)
+    raise ValueError("%s: unsupported parameters format %s" % (nn_path, type(params)))
+
+
+def save_parameters(params, npz_path):
+    """
+    Saves the weights needed for inference from a parameter name -> array dictionary
+    """
+    weights = {}
+    num_fc = 0
+    while (FC_FORMAT % num_fc) + 'w:0' in params:
+        weights['fc%d_w' % num_fc] = params[(FC_FORMAT % num_fc) + 'w:0']
+        weights['fc%d_b' % num_fc] = params[(FC_FORMAT % num_fc) + 'b:0']
+        num_fc += 1
+
+    weights['lstm_wx'] = params[LSTM_PREFIX + 'wx:0']
+    weights['lstm_wh'] = params[LSTM_PREFIX + 'wh:0']
+    weights['lstm_b'] = params[LSTM_PREFIX + 'b:0']
+    weights['pi_w'] = params[PI_PREFIX + 'w:0']
+    weights['pi_b'] = params[PI_PREFIX + 'b:0']
+    weights['num_fc'] = np.array(num_fc)
+
+    # np.savez adds the extension if missing, so make sure the temporary file already has it
+    temp = "%s.tmp.npz" % os.path.splitext(npz_path)[0]
+    np.savez(temp, **{name: np.asarray(value, dtype=np.float32) for name, value in weights.items()})
+    os.replace(temp, npz_path)
+
+
+def export(nn_path, npz_path=None):
+    """
+    Converts the A2C MlpLstmPolicy saved at nn_path to a numpy only npz file, returns its path
+    """
+    npz_path = npz_path or inference_path(nn_path)
+    start = time.time()
+    save_parameters(_load_parameters(nn_path), npz_path)
+    logging.info("[ai] exported %s to %s in %.2fs" % (nn_path, npz_path, time.time() - start))
+    return npz_path
+
+
+def needs_export(nn_path, npz_path=None):
+    npz_path = npz_path or inference_path(nn_path)
+    if not os.path.exists(nn_path):
+        return False
+    return not os.path.exists(npz_path) or os.path.getmtime(npz_path) < os.path.getmtime(nn_path)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class Policy(object):
+    """
+    Numpy reimplementation of the stable_baselines MlpLstmPolicy forward pass, enough to pick
+    the next action from an observation with the weights exported by save_parameters.
+    """
+
+    def __init__(self, npz_path, nvec):
+        with np.load(npz_path) as data:
+            weights = {name: data[name] for name in data.files}
+
+        num_fc = int(weights['num_fc'])
+        self._fc = [(weights['fc%d_w' % i], weights['fc%d_b' % i]) for i in range(num_fc)]
+        self._lstm_wx = weights['lstm_wx']
+        self._lstm_wh = weights['lstm_wh']
+        self._lstm_b = weights['lstm_b']
+        self._pi_w = weights['pi_w']
+        self._pi_b = weights['pi_b']
+        self._n_lstm = self._lstm_wh.shape[0]
+        # where each discrete action logits start and end in the pi layer output
+        self._splits = np.cumsum(nvec)[:-1]
+
+        if self._pi_w.shape[1] != sum(nvec):
+            raise ValueError("policy has %d outputs, action space needs %d" % (self._pi_w.shape[1], sum(nvec)))
+
+        self.initial_state = np.zeros((1, 2 * self._n_lstm), dtype=np.float32)
+
+    def _lstm(self, x, state):
+        cell, hidden = np.split(state, 2, axis=1)
+        gates = x @ self._lstm_wx + hidden @ self._lstm_wh + self._lstm_b
+        in_gate, forget_gate, out_gate, candidate = np.split(gates, 4, axis=1)
+        cell = _sigmoid(forget_gate) * cell + _sigmoid(in_gate) * np.tanh(candidate)
+        hidden = _sigmoid(out_gate) * np.tanh(cell)
+        return hidden, np.concatenate((cell, hidden), axis=1)
+
+    def predict(self, observation, state=None, deterministic=False):
+        """
+        Returns the action for a single observation and the new LSTM state, like the
+        stable_baselines model it starts from the initial state if none is given
+        """
+        x = np.asarray(observation, dtype=np.float32).reshape(1, -1)
+        for w, b in self._fc:
+            x = np.tanh(x @ w + b)
+
+        latent, state = self._lstm(x, self.initial_state if state is None else state)
+        logits = latent @ self._pi_w + self._pi_b
+
+        action = []
+        for group in np.split(logits[0], self._splits):
+            if not deterministic:
+                # gumbel-max sampling, same as the multi categorical distribution
+                noise = np.random.uniform(np.finfo(np.float32).tiny, 1.0, size=group.shape)
+                group = group - np.log(-np.log(noise))
+            action.append(np.argmax(group))
+
+        return np.array(action), state
+
+
+class Model(object):
+    """
+    Quacks like the subset of the stable_baselines model the trainer uses when it never trains.
+    """
+
+    def __init__(self, env, policy):
+        self.env = env
+        self.policy = policy
+
+    def predict(self, observation, state=None, deterministic=False):
+        return self.policy.predict(observation, state, deterministic)
@@ -0,0 +1,169 @@
+import os
+import time
+import logging
+
+import gym
+from gym import spaces
+import numpy as np
+
+import pwnagotchi.ai.reward as reward
+import pwnagotchi.ai.replay as replay
+
+
+def load_transitions(filenames):
+    """
+    Returns the action space and the transitions logged with the most recent one, skipping the
+    ones recorded with a different action space or observation size
+    """
+    nvec, obs_size, transitions = None, None, []
+    for filename in filenames:
+        for rec_nvec, t in replay.read(filename):
+            if rec_nvec != nvec or t.observation.size != obs_size:
+                if transitions:
+                    logging.info("[ai] action space changed in %s, dropping %d older transitions" %
+                                 (filename, len(transitions)))
+                nvec, obs_size, transitions = rec_nvec, t.observation.size, []
+            transitions.append(t)
+
+    return nvec, transitions
+
+
+class ReplayEnvironment(gym.Env):
+    """
+    Replays the observations logged on the unit, weighting the imitation of each logged policy by how
+    much better than average its epoch went: every step is rewarded with the fraction of the logged
+    policy it reproduces times the normalized advantage of the logged reward. Reproducing the policies
+    of the good epochs pays off, reproducing the ones of the bad epochs costs, doing something else is
+    neutral as the world never reacted to it.
+    """
+    metadata = {'render.modes': []}
+
+    def __init__(self, nvec, transitions, offset=0):
+        super(ReplayEnvironment, self).__init__()
+        self._transitions = transitions
+        self._idx = offset % len(transitions)
+        self.action_space = spaces.MultiDiscrete(nvec)
+        self.observation_space = spaces.Box(low=0, high=1, shape=(1, transitions[0].observation.size),
+                                            dtype=np.float32)
+
+        # a few epochs way out of the declared range would make every other one look average
+        rewards = np.clip([t.reward for t in transitions], *reward.range)
+        std = rewards.std()
+        self._advantages = (rewards - rewards.mean()) / (std if std > 0 else 1.0)
+
+    def _observation(self):
+        return self._transitions[self._idx].observation.reshape(self.observation_space.shape)
+
+    def step(self, policy):
+        t = self._transitions[self._idx]
+        match = np.mean(np.asarray(policy).ravel() == t.policy)
+        r = float(match * self._advantages[self._idx])
+
+        self._idx += 1
+        done = self._idx == len(self._transitions)
+        if done:
+            self._idx = 0
+
+        return self._observation(), r, done, {}
+
+    def reset(self):
+        return self._observation()
+
+    def render(self, mode='human'):
+        pass
+
+
+def save(model, path, generations=0):
+    from pwnagotchi.ai.checkpoint import model_writer
+
+    logging.info("[ai] saving model to %s ..." % path)
+    model_writer(model, path, generations)()
+
+
+class _Progress(object):
+    """
+    learn() callback logging the environment steps per second every interval seconds
+    """
+
+    def __init__(self, num_envs, interval=10.0):
+        self._num_envs = num_envs
+        self._interval = interval
+        self._started = self._last = time.time()
+        self.steps = 0
+
+    def __call__(self, _locals, _globals):
+        # called once per update, n_steps per environment
+        self.steps += _locals['self'].n_steps * self._num_envs
+        now = time.time()
+        if now - self._last >= self._interval:
+            self._last = now
+            logging.info("[ai] %d steps, %.1f steps/s" % (self.steps, self.steps / (now - self._started)))
+        return True
+
+
+def learn(config, env_fns, timesteps, output):
+    """
+    Trains the model at ai.path (or a new one) on the environments created by env_fns, one
+    subprocess each if more than one, and saves it to output (or ai.path)
+    """
+    from stable_baselines import A2C
+    from stable_baselines.common.policies import MlpLstmPolicy
+    from stable_baselines.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+    num_envs = len(env_fns)
+    env = SubprocVecEnv(env_fns) if num_envs > 1 else DummyVecEnv(env_fns)
+    try:
+        logging.info("[ai] creating model with %d environment%s ..." % (num_envs, 's' if num_envs > 1 else ''))
+        model = A2C(MlpLstmPolicy, env, **config['ai']['params'])
+
+        path = config['ai']['path']
+        if os.path.exists(path):
+            # only the weights, the lstm state of the saved model depends on how many environments it had
+            logging.info("[ai] loading %s ..." % path)
+            try:
+                model.load_parameters(path)
+            except Exception as e:
+                # the spaces might have changed since it was saved, as in pwnagotchi.ai.load
+                logging.warning("[ai] could not load %s (%s), starting with a new model" % (path, e))
+
+        logging.info("[ai] learning for %d steps ..." % timesteps)
+        progress = _Progress(num_envs)
+        start = time.time()
+        model.learn(total_timesteps=timesteps, callback=progress)
+        elapsed = time.time() - start
+        logging.info("[ai] %d steps in %.2fs (%.1f steps/s)" %
+                     (progress.steps, elapsed, progress.steps / elapsed if elapsed else 0))
+
+        save(model, output or path, config['ai']['checkpoint']['generations'])
+    finally:
+        env.close()
+
+    return 0
+
+
+def train(config, filenames, timesteps, output, workers=1):
+    """
+    Trains the model to imitate the logged policies of the best epochs, each worker starting from a different
+    point in time
+    """
+    nvec, transitions = load_transitions(filenames)
+    if not transitions:
+        logging.error("[ai] no transitions found in %s" % ', '.join(filenames))
+        return 1
+
+    logging.info("[ai] %d transitions loaded from %d files" % (len(transitions), len(filenames)))
+
+    env_fns = [lambda offset=i * len(transitions) // workers: ReplayEnvironment(nvec, transitions, offset)
+               for i in range(workers)]
+    return learn(config, env_fns, timesteps or len(transitions), output)
+
+
+def simulate(config, timesteps, output, workers=1, seed=None):
+    """
+    Trains the model on the WiFi simulator, each worker with its own world
+    """
+    from pwnagotchi.ai.sim import Simulator
+
+    env_fns = [lambda i=i: Simulator(config, seed=None if seed is None else seed + i).environment()
+               for i in range(workers)]
+    return learn(config, env_fns, timesteps, output)
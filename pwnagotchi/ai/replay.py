@@ -0,0 +1,133 @@
+import os
+import glob
+import time
+import struct
+import logging
+import threading
+
+import numpy as np
+
+# every record is a type byte and the payload length, followed by the payload
+RECORD_HEADER = struct.Struct('<cI')
+# action space of the transitions that follow: int32 nvec
+RECORD_SPACE = b'S'
+# transition: timestamp, reward, observation size, float32 observation, int32 policy
+RECORD_TRANSITION = b'T'
+TRANSITION_HEADER = struct.Struct('<dfH')
+
+
+class Transition(object):
+    __slots__ = ('timestamp', 'observation', 'policy', 'reward')
+
+    def __init__(self, timestamp, observation, policy, reward):
+        self.timestamp = timestamp
+        self.observation = observation
+        self.policy = policy
+        self.reward = reward
+
+
+class ReplayLog(object):
+    """
+    Append only log of the (observation, policy, reward) transitions of the environment, rotated
+    to path.1, path.2, ... (the higher the newer) once bigger than max_size bytes, to be used by
+    the offline trainer. Only the newest generations rotated logs are kept.
+    """
+
+    def __init__(self, path, max_size, generations=4):
+        self._path = path
+        self._max_size = max_size
+        self._generations = generations
+        self._lock = threading.Lock()
+        self._nvec = None
+        self._fp = None
+
+    def _open(self):
+        if self._fp is None:
+            self._fp = open(self._path, 'ab')
+            # the action space might be different since the last time we wrote this file
+            self._write(RECORD_SPACE, np.asarray(self._nvec, dtype='<i4').tobytes())
+
+    def _write(self, kind, payload):
+        self._fp.write(RECORD_HEADER.pack(kind, len(payload)))
+        self._fp.write(payload)
+
+    def _rotate(self):
+        self._fp.close()
+        self._fp = None
+        # one more than the newest one, lower numbers might have been deleted already
+        rotated = [int(f.rsplit('.', 1)[1]) for f in files(self._path) if f != self._path]
+        counter = max(rotated) + 1 if rotated else 1
+        os.replace(self._path, "%s.%d" % (self._path, counter))
+        logging.info("[ai] replay log rotated to %s.%d" % (self._path, counter))
+
+        # drop the oldest ones, or they'd fill the sd card
+        rotated = files(self._path)
+        for filename in rotated[:max(len(rotated) - self._generations, 0)]:
+            logging.info("[ai] deleting %s" % filename)
+            os.remove(filename)
+
+    def append(self, observation, policy, reward, nvec):
+        observation = np.asarray(observation, dtype='<f4').ravel()
+        payload = TRANSITION_HEADER.pack(time.time(), reward, observation.size) + \
+                  observation.tobytes() + \
+                  np.asarray(policy, dtype='<i4').ravel().tobytes()
+
+        with self._lock:
+            nvec = list(nvec)
+            if nvec != self._nvec and self._fp is not None:
+                self._fp.close()
+                self._fp = None
+            self._nvec = nvec
+
+            self._open()
+            self._write(RECORD_TRANSITION, payload)
+            self._fp.flush()
+
+            if self._fp.tell() >= self._max_size:
+                self._rotate()
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+
+def files(path):
+    """
+    Returns the rotated logs of path and path itself, oldest first
+    """
+    found = [f for f in glob.glob("%s.*" % glob.escape(path)) if f.rsplit('.', 1)[1].isdigit()]
+    found.sort(key=lambda f: int(f.rsplit('.', 1)[1]))
+    if os.path.exists(path):
+        found.append(path)
+    return found
+
+
+def read(filename):
+    """
+    Yields the (nvec, Transition) tuples logged in filename, stops at the first truncated record
+    """
+    nvec = None
+    with open(filename, 'rb') as fp:
+        while True:
+            header = fp.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+
+            kind, size = RECORD_HEADER.unpack(header)
+            payload = fp.read(size)
+            if len(payload) < size:
+                logging.warning("%s: truncated record, skipping the rest of the file" % filename)
+                break
+
+            if kind == RECORD_SPACE:
+                nvec = tuple(np.frombuffer(payload, dtype='<i4').tolist())
+            elif kind == RECORD_TRANSITION:
+                timestamp, reward, obs_size = TRANSITION_HEADER.unpack_from(payload)
+                offset = TRANSITION_HEADER.size
+                observation = np.frombuffer(payload, dtype='<f4', count=obs_size, offset=offset)
+                policy = np.frombuffer(payload, dtype='<i4', offset=offset + obs_size * 4)
+                yield nvec, Transition(timestamp, observation, policy, reward)
+            else:
+                logging.warning("%s: unknown record type %s" % (filename, kind))
@@ -0,0 +1,92 @@
+import threading
+from collections import namedtuple
+
+# train: whether to train at all, epochs: for how long, reason: why (or why not)
+Decision = namedtuple('Decision', ('train', 'epochs', 'reason'))
+
+
+class TrainingScheduler(object):
+    """
+    Decides if and for how long the model can train given the cpu load, memory usage and temperature
+    of the last epoch, plus the battery level if an UPS is available: training is deferred when the
+    unit is busy, hot or low on battery, shrunk when it's warm and paused if it gets hot meanwhile.
+    """
+
+    def __init__(self, config):
+        self._config = config['ai']['scheduler']
+        self._epochs = config['ai']['epochs_per_episode']
+        self._lock = threading.Lock()
+        self._stats = {
+            'trained': 0,
+            'shrunk': 0,
+            'deferred': 0,
+            'paused': 0,
+            'last_reason': '',
+        }
+
+    def _count(self, what, reason):
+        with self._lock:
+            self._stats[what] += 1
+            if what == 'shrunk':
+                self._stats['trained'] += 1
+            self._stats['last_reason'] = reason
+
+    def _blocker(self, data, battery):
+        cfg = self._config
+        temp = data.get('temperature', 0)
+        if temp >= cfg['max_temperature']:
+            return "temperature %dC >= %dC" % (temp, cfg['max_temperature'])
+
+        cpu = data.get('cpu_load', 0.0)
+        if cpu >= cfg['max_cpu_load']:
+            return "cpu load %d%% >= %d%%" % (cpu * 100, cfg['max_cpu_load'] * 100)
+
+        mem = data.get('mem_usage', 0.0)
+        if mem >= cfg['max_mem_usage']:
+            return "memory usage %d%% >= %d%%" % (mem * 100, cfg['max_mem_usage'] * 100)
+
+        if battery is not None and battery < cfg['min_battery']:
+            return "battery %d%% < %d%%" % (battery, cfg['min_battery'])
+
+        return None
+
+    def decide(self, data, battery=None):
+        """
+        Returns the Decision for a new training episode given the last epoch data
+        """
+        if not self._config['enabled']:
+            return Decision(True, self._epochs, 'scheduler disabled')
+
+        reason = self._blocker(data, battery)
+        if reason is not None:
+            self._count('deferred', reason)
+            return Decision(False, 0, reason)
+
+        # scale the episode down linearly between warm and max temperature
+        cfg = self._config
+        temp = data.get('temperature', 0)
+        if temp > cfg['warm_temperature']:
+            heat = (temp - cfg['warm_temperature']) / float(cfg['max_temperature'] - cfg['warm_temperature'])
+            epochs = max(cfg['min_epochs'], int(self._epochs * (1.0 - heat)))
+            reason = "temperature %dC > %dC" % (temp, cfg['warm_temperature'])
+            self._count('shrunk', reason)
+            return Decision(True, epochs, reason)
+
+        self._count('trained', 'ok')
+        return Decision(True, self._epochs, 'ok')
+
+    def should_continue(self, data, battery=None):
+        """
+        Returns None if the current episode can go on, otherwise the reason to pause it
+        """
+        if not self._config['enabled']:
+            return None
+
+        reason = self._blocker(data, battery)
+        if reason is not None:
+            self._count('paused', reason)
+        return reason
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
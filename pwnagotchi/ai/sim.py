@@ -0,0 +1,273 @@
+import copy
+import math
+import random
+import logging
+
+from pwnagotchi.ai.epoch import Epoch
+from pwnagotchi.history import InteractionHistory
+
+# 2.4GHz and the 5GHz channels that fit in the non extended observation
+CHANNELS = list(range(1, 15)) + list(range(36, 65, 4)) + list(range(100, 141, 4))
+# where access points usually are
+POPULAR_CHANNELS = [1, 6, 11, 36, 44, 100]
+# average seconds an access point / client station stays around before leaving, and away before coming back
+AP_LIFETIME = 1800.0
+AP_AWAY_TIME = 900.0
+STA_LIFETIME = 600.0
+STA_AWAY_TIME = 600.0
+# probability of an access point coming back being a brand new one, as if we moved somewhere else
+RENEW_PROB = 0.5
+# time constant of the discovery of an access point / client station while sniffing
+DISCOVERY_TIME = 10.0
+# time constant of a deauthenticated station reconnecting, hence of capturing its handshake
+RECONNECT_TIME = 5.0
+# probabilities of getting a PMKID from an association and a full handshake after a deauth
+PMKID_PROB = 0.15
+HANDSHAKE_PROB = 0.3
+# seconds spent sending an association or deauth frame, too short to let the world change
+INTERACTION_TIME = 0.05
+
+
+def _leaves(dt, lifetime, rnd):
+    return rnd.random() < 1.0 - math.exp(-dt / lifetime)
+
+
+class _Station(object):
+    def __init__(self, mac, rssi):
+        self.mac = mac
+        self.rssi = rssi
+        self.present = True
+        self.lost_at = None
+        self.known = False
+
+
+class _AccessPoint(_Station):
+    def __init__(self, mac, rssi, channel, stations, pmkid):
+        super(_AccessPoint, self).__init__(mac, rssi)
+        self.channel = channel
+        self.stations = stations
+        self.pmkid = pmkid
+
+
+class SimulatedEpoch(Epoch):
+    # thousands of epochs per second, don't flood the log with them
+    LOG_LEVEL = logging.DEBUG
+
+    def __init__(self, config, simulator):
+        super(SimulatedEpoch, self).__init__(config, clock=simulator.now)
+        self._simulator = simulator
+
+    def _system_metrics(self):
+        return 0.0, 0.0, 0
+
+    def wait_for_epoch_data(self, with_observation=True, timeout=None):
+        # nothing to wait for, just simulate the next epoch
+        self._simulator.run_epoch()
+        return super(SimulatedEpoch, self).wait_for_epoch_data(with_observation, timeout)
+
+
+class Simulator(object):
+    """
+    Synthetic WiFi world with access points and client stations coming and going on different channels,
+    driven by the same loop and personality parameters as the real unit (recon and hop times, ttls,
+    min_rssi, max_interactions, misses before recon, channels, ...), but on a simulated clock. It quacks
+    like the agent and epoch pwnagotchi.ai.gym.Environment needs, so policies and rewards can be
+    evaluated at thousands of epochs per second without any hardware.
+    """
+
+    def __init__(self, config, num_aps=40, max_clients=6, channels=None, seed=None):
+        self._config = copy.deepcopy({'personality': config['personality']})
+        self._rnd = random.Random(seed)
+        self._now = 0.0
+        self._channels = channels or CHANNELS
+        self._max_clients = max_clients
+        self._num_created = 0
+        self._aps = [self._new_ap() for _ in range(num_aps)]
+        # same interactions bookkeeping as the agent, on the simulated clock and never saved
+        history = config['main']['history']
+        self._history = InteractionHistory(None, history['max_entries'], history['ttl'], history['half_life'],
+                                           clock=self.now)
+        self._handshakes = set()
+        self._epoch = SimulatedEpoch(self._config, self)
+        self.steps = 0
+
+    def _new_ap(self):
+        rnd = self._rnd
+        idx = self._num_created
+        self._num_created += 1
+        if rnd.random() < 0.7:
+            channel = rnd.choice([ch for ch in POPULAR_CHANNELS if ch in self._channels] or self._channels)
+        else:
+            channel = rnd.choice(self._channels)
+        stations = [_Station('sta-%d-%d' % (idx, j), rnd.uniform(-95, -40)) for j in range(rnd.randint(0, self._max_clients))]
+        return _AccessPoint('ap-%d' % idx, rnd.uniform(-95, -30), channel, stations, rnd.random() < 0.5)
+
+    def now(self):
+        return self._now
+
+    def epoch(self):
+        return self._epoch
+
+    def environment(self):
+        import pwnagotchi.ai.gym as wrappers
+        return wrappers.Environment(self, self._epoch)
+
+    # the agent interface used by Environment
+
+    def supported_channels(self):
+        return self._channels
+
+    def on_ai_policy(self, new_params):
+        personality = self._config['personality']
+        for name, value in new_params.items():
+            if name in personality:
+                personality[name] = value
+
+    def on_ai_step(self):
+        self.steps += 1
+
+    def on_ai_transition(self, observation, policy, reward, nvec):
+        pass
+
+    def is_training(self):
+        return True
+
+    def training_epochs(self):
+        return 0
+
+    # the world
+
+    def _evolve(self, station, dt, lifetime, away_time, discovery_time):
+        if station.present:
+            if _leaves(dt, lifetime, self._rnd):
+                station.present = False
+                station.lost_at = self._now
+            elif not station.known:
+                station.known = _leaves(dt, discovery_time, self._rnd)
+        elif _leaves(dt, away_time, self._rnd):
+            station.present = True
+            station.lost_at = None
+            station.known = False
+            return True
+        return False
+
+    def _advance(self, dt, channel=0):
+        """
+        Moves the clock forward by dt seconds while sniffing on channel (0 for all of them)
+        """
+        self._now += dt
+        self._epoch.track(sleep=True, inc=dt)
+        for idx, ap in enumerate(self._aps):
+            # hopping on all channels is slower to discover things than sticking to one
+            on_channel = channel == 0 or ap.channel == channel
+            discovery = DISCOVERY_TIME if channel else DISCOVERY_TIME * 3
+            if self._evolve(ap, dt, AP_LIFETIME, AP_AWAY_TIME, discovery if on_channel else float('inf')) and \
+                    self._rnd.random() < RENEW_PROB:
+                self._aps[idx] = ap = self._new_ap()
+            for sta in ap.stations:
+                self._evolve(sta, dt, STA_LIFETIME, STA_AWAY_TIME, discovery if on_channel else float('inf'))
+
+    def _visible(self, station, ttl):
+        # bettercap keeps reporting what it saw until the ttl expires
+        personality = self._config['personality']
+        if station.rssi < personality['min_rssi']:
+            return False
+        if station.present:
+            return station.known
+        return station.lost_at is not None and (self._now - station.lost_at) < ttl
+
+    def access_points(self):
+        personality = self._config['personality']
+        aps = []
+        for ap in self._aps:
+            if self._visible(ap, personality['ap_ttl']):
+                clients = [sta for sta in ap.stations if self._visible(sta, personality['sta_ttl'])]
+                aps.append((ap, clients))
+        return aps
+
+    def _should_interact(self, mac):
+        if mac in self._handshakes:
+            return False
+        return self._history.should_interact(mac, self._config['personality']['max_interactions'])
+
+    def _is_stale(self):
+        return self._epoch.num_missed > self._config['personality']['max_misses_for_recon']
+
+    def _handshake(self, ap):
+        self._handshakes.add(ap.mac)
+        self._epoch.track(handshake=True)
+
+    def run_epoch(self):
+        """
+        Simulates one iteration of the main loop: recon, then associate and deauth on every channel
+        """
+        personality = self._config['personality']
+        epoch = self._epoch
+        rnd = self._rnd
+
+        recon_time = personality['recon_time']
+        if epoch.inactive_for >= personality['max_inactive_scale']:
+            recon_time *= personality['recon_inactive_multiplier']
+        self._advance(recon_time)
+
+        visible = self.access_points()
+        epoch.observe([{'mac': ap.mac, 'channel': ap.channel, 'rssi': ap.rssi, 'clients': clients}
+                       for ap, clients in visible], [])
+
+        grouped = {}
+        for ap, clients in visible:
+            if not personality['channels'] or ap.channel in personality['channels']:
+                grouped.setdefault(ap.channel, []).append((ap, clients))
+
+        current = 0
+        for ch, group in sorted(grouped.items(), key=lambda kv: len(kv[1]), reverse=True):
+            if self._is_stale():
+                break
+
+            wait = 0
+            if epoch.did_deauth:
+                wait = personality['hop_recon_time']
+            elif epoch.did_associate:
+                wait = personality['min_recon_time']
+            if current != 0 and wait > 0:
+                self._advance(wait, current)
+            current = ch
+            epoch.track(hop=True)
+
+            for ap, clients in group:
+                if personality['associate'] and not self._is_stale() and self._should_interact(ap.mac):
+                    self._now += INTERACTION_TIME
+                    if not ap.present:
+                        epoch.track(miss=True)
+                    else:
+                        epoch.track(assoc=True)
+                        if ap.pmkid and rnd.random() < PMKID_PROB:
+                            self._handshake(ap)
+
+                for sta in clients:
+                    if personality['deauth'] and not self._is_stale() and self._should_interact(sta.mac):
+                        self._now += INTERACTION_TIME
+                        if not ap.present or not sta.present:
+                            epoch.track(miss=True)
+                        else:
+                            epoch.track(deauth=True)
+                            # the longer we stay on the channel, the more likely we see the station reconnecting
+                            p = HANDSHAKE_PROB * (1.0 - math.exp(-personality['hop_recon_time'] / RECONNECT_TIME))
+                            if rnd.random() < p:
+                                self._handshake(ap)
+
+        epoch.next()
+
+
+def run(env, epochs, policy=None):
+    """
+    Runs the environment for a number of epochs with the given policy function
+    (random actions if None) and returns the list of rewards
+    """
+    rewards = []
+    obs = env.reset()
+    for _ in range(epochs):
+        action = policy(obs) if policy is not None else env.action_space.sample()
+        obs, reward, _, _ = env.step(action)
+        rewards.append(reward)
+    return rewards
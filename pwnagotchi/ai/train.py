@@ -8,12 +8,19 @@ import logging
 
 import pwnagotchi.plugins as plugins
 import pwnagotchi.ai as ai
+import pwnagotchi.ai.checkpoint as checkpoint
+from pwnagotchi.ai.replay import ReplayLog
+from pwnagotchi.ai.scheduler import TrainingScheduler
+from pwnagotchi.log import parse_max_size
 
 
 class Stats(object):
-    def __init__(self, path, events_receiver):
+    def __init__(self, path, events_receiver, checkpoints=None, save_interval=0):
         self._lock = threading.Lock()
         self._receiver = events_receiver
+        # if set, writes are done by the checkpoint manager at most every save_interval seconds
+        self._checkpoints = checkpoints
+        self._save_interval = save_interval
 
         self.path = path
         self.born_at = time.time()
@@ -63,6 +70,12 @@ class Stats(object):
                 self.best_reward, self.worst_reward = obj['rewards']['best'], obj['rewards']['worst']
 
     def save(self):
+        if self._checkpoints is None:
+            self._write()
+        else:
+            self._checkpoints.submit('stats', self._write, delay=self._save_interval)
+
+    def _write(self):
         with self._lock:
             logging.info("[ai] saving %s" % self.path)
 
@@ -90,7 +103,15 @@ class AsyncTrainer(object):
         self._is_training = False
         self._training_epochs = 0
         self._nn_path = self._config['ai']['path']
-        self._stats = Stats("%s.json" % os.path.splitext(self._nn_path)[0], self)
+        self._checkpoints = checkpoint.CheckpointManager()
+        self._stats = Stats("%s.json" % os.path.splitext(self._nn_path)[0], self, self._checkpoints,
+                            self._config['ai']['checkpoint']['stats_interval'])
+        self._training_scheduler = TrainingScheduler(self._config)
+        self._replay = None
+        if self._config['ai']['replay']['enabled']:
+            replay_cfg = self._config['ai']['replay']
+            self._replay = ReplayLog(replay_cfg['path'], parse_max_size(replay_cfg['max_size']),
+                                     replay_cfg['generations'])
 
     def set_training(self, training, for_epochs=0):
         self._is_training = training
@@ -104,6 +125,18 @@ class AsyncTrainer(object):
     def is_training(self):
         return self._is_training
 
+    def training_stats(self):
+        return self._training_scheduler.stats()
+
+    def _battery(self):
+        ups = getattr(plugins.loaded.get('ups_lite'), 'ups', None)
+        if ups is not None:
+            try:
+                return ups.capacity()
+            except Exception as e:
+                logging.debug("[ai] can't read the battery capacity: %s" % e)
+        return None
+
     def training_epochs(self):
         return self._training_epochs
 
@@ -111,10 +144,11 @@ class AsyncTrainer(object):
         _thread.start_new_thread(self._ai_worker, ())
 
     def _save_ai(self):
-        logging.info("[ai] saving model to %s ..." % self._nn_path)
-        temp = "%s.tmp" % self._nn_path
-        self._model.save(temp)
-        os.replace(temp, self._nn_path)
+        # only the parameters snapshot happens here, the checkpoint manager writes the
+        # model (and its numpy only copy for the inference mode) in the background
+        logging.debug("[ai] checkpointing model to %s ..." % self._nn_path)
+        writer = checkpoint.model_writer(self._model, self._nn_path, self._config['ai']['checkpoint']['generations'])
+        self._checkpoints.submit('model', writer)
 
     def on_ai_step(self):
         self._model.env.render()
@@ -124,10 +158,47 @@ class AsyncTrainer(object):
 
         self._stats.on_epoch(self._epoch.data(), self._is_training)
 
+    def on_ai_transition(self, observation, policy, reward, nvec):
+        if self._replay is not None:
+            try:
+                self._replay.append(observation, policy, reward, nvec)
+            except Exception as e:
+                logging.error("[ai] error while logging transition: %s" % e)
+
     def on_ai_training_step(self, _locals, _globals):
         self._model.env.render()
         plugins.on('ai_training_step', self, _locals, _globals)
 
+        reason = self._training_scheduler.should_continue(self._epoch.data(), self._battery())
+        if reason is not None:
+            self.on_ai_training_paused(reason)
+            # stops learn()
+            return False
+
+    def on_ai_training_deferred(self, reason):
+        logging.info("[ai] training deferred: %s" % reason)
+        plugins.on('ai_training_deferred', self, reason)
+
+    def on_ai_training_shrunk(self, epochs, reason):
+        logging.info("[ai] training shrunk to %d epochs: %s" % (epochs, reason))
+        plugins.on('ai_training_shrunk', self, epochs, reason)
+
+    def on_ai_training_paused(self, reason):
+        logging.info("[ai] training paused: %s" % reason)
+        plugins.on('ai_training_paused', self, reason)
+
+    def _training_episode(self):
+        """
+        Returns for how many epochs to train now, 0 if the unit can't afford it
+        """
+        epochs_per_episode = self._config['ai']['epochs_per_episode']
+        decision = self._training_scheduler.decide(self._epoch.data(), self._battery())
+        if not decision.train:
+            self.on_ai_training_deferred(decision.reason)
+        elif decision.epochs < epochs_per_episode:
+            self.on_ai_training_shrunk(decision.epochs, decision.reason)
+        return decision.epochs
+
     def on_ai_policy(self, new_params):
         plugins.on('ai_policy', self, new_params)
         logging.info("[ai] setting new policy:")
@@ -140,9 +211,11 @@ class AsyncTrainer(object):
             else:
                 logging.error("[ai] param %s not in personality configuration!" % name)
 
-        self.run('set wifi.ap.ttl %d' % self._config['personality']['ap_ttl'])
-        self.run('set wifi.sta.ttl %d' % self._config['personality']['sta_ttl'])
-        self.run('set wifi.rssi.min %d' % self._config['personality']['min_rssi'])
+        self.run_many([
+            'set wifi.ap.ttl %d' % self._config['personality']['ap_ttl'],
+            'set wifi.sta.ttl %d' % self._config['personality']['sta_ttl'],
+            'set wifi.rssi.min %d' % self._config['personality']['min_rssi']
+        ])
 
     def on_ai_ready(self):
         self._view.on_ai_ready()
@@ -158,19 +231,40 @@ class AsyncTrainer(object):
         self._view.on_demotivated(r)
         plugins.on('ai_worst_reward', self, r)
 
+    def _ai_inference_worker(self):
+        # only returns if the inference model couldn't be loaded
+        self._model = ai.load_inference(self._config, self, self._epoch)
+        if not self._model:
+            return
+
+        self.on_ai_ready()
+
+        obs = self._model.env.reset()
+        while True:
+            self._model.env.render()
+            # run the inference, never train
+            action, _ = self._model.predict(obs)
+            obs, _, _, _ = self._model.env.step(action)
+
     def _ai_worker(self):
+        if self._config['ai']['mode'] == 'inference':
+            self._ai_inference_worker()
+            logging.warning("[ai] falling back to the full model")
+
         self._model = ai.load(self._config, self, self._epoch)
 
         if self._model:
             self.on_ai_ready()
 
-            epochs_per_episode = self._config['ai']['epochs_per_episode']
-
             obs = None
             while True:
                 self._model.env.render()
                 # enter in training mode?
+                epochs_per_episode = 0
                 if random.random() > self._config['ai']['laziness']:
+                    epochs_per_episode = self._training_episode()
+
+                if epochs_per_episode > 0:
                     logging.info("[ai] learning for %d epochs ..." % epochs_per_episode)
                     try:
                         self.set_training(True, epochs_per_episode)
@@ -0,0 +1,155 @@
+import time
+import logging
+import threading
+
+# events that keep the index up to date, if bettercap is told to silence
+# any of these the index can only rely on full session reconciliation
+EVENTS = ('wifi.ap.new', 'wifi.ap.lost', 'wifi.client.new', 'wifi.client.lost')
+
+
+def _copy_ap(ap):
+    # access points are shared with the session snapshot, never modify them in place
+    return dict(ap, clients=list(ap.get('clients', [])))
+
+
+class AccessPointSnapshot(tuple):
+    """
+    Immutable, channel sorted list of access points as seen at a given time, with the per channel
+    aggregates computed once so that the UI counters, the epoch observation, the scheduler and the
+    plugins can all share it instead of walking the list again.
+    """
+
+    def __new__(cls, aps=()):
+        return super(AccessPointSnapshot, cls).__new__(cls, sorted(aps, key=lambda ap: ap['channel']))
+
+    def __init__(self, aps=()):
+        super(AccessPointSnapshot, self).__init__()
+        by_channel = {}
+        stations = {}
+        for ap in self:
+            ch = ap['channel']
+            by_channel.setdefault(ch, []).append(ap)
+            stations[ch] = stations.get(ch, 0) + len(ap['clients'])
+
+        # channel -> tuple of access points, in ascending channel order
+        self.by_channel = {ch: tuple(group) for ch, group in by_channel.items()}
+        # channel -> number of client stations
+        self.stations_per_channel = stations
+        self.total_stations = sum(stations.values())
+
+    def aps_on(self, channel):
+        return len(self.by_channel.get(channel, ()))
+
+    def stations_on(self, channel):
+        return self.stations_per_channel.get(channel, 0)
+
+
+class AccessPointIndex(object):
+    """
+    In memory view of the access points and client stations bettercap can see, keyed
+    by BSSID and station MAC, updated incrementally from websocket events and reconciled
+    with the full session every once in a while in case some event got lost.
+    """
+
+    def __init__(self, max_age=30):
+        self._lock = threading.Lock()
+        self._max_age = max_age
+        self._aps = {}
+        self._stations = {}
+        self._reconciled_at = 0
+
+    def is_stale(self):
+        with self._lock:
+            return (time.time() - self._reconciled_at) > self._max_age
+
+    def reconcile(self, aps):
+        aps = {ap['mac'].lower(): _copy_ap(ap) for ap in aps}
+        stations = {}
+        for bssid, ap in aps.items():
+            for sta in ap['clients']:
+                stations[sta['mac'].lower()] = bssid
+
+        with self._lock:
+            self._aps = aps
+            self._stations = stations
+            self._reconciled_at = time.time()
+
+    def refresh_rssi(self, aps):
+        """
+        Updates the signal strength of the known access points with the one reported by the session,
+        the only field the events don't keep up to date
+        """
+        with self._lock:
+            for ap in aps:
+                known = self._aps.get(ap['mac'].lower())
+                if known is not None and known['rssi'] != ap['rssi']:
+                    # copy on write, the clients list is never modified in place so it can be shared
+                    self._aps[ap['mac'].lower()] = dict(known, rssi=ap['rssi'])
+
+    def on_event(self, jmsg):
+        tag = jmsg['tag']
+        if tag not in EVENTS:
+            return False
+
+        data = jmsg['data']
+        with self._lock:
+            if tag == 'wifi.ap.new':
+                self._aps[data['mac'].lower()] = _copy_ap(data)
+
+            elif tag == 'wifi.ap.lost':
+                bssid = data['mac'].lower()
+                ap = self._aps.pop(bssid, None)
+                if ap is not None:
+                    for sta in ap['clients']:
+                        self._stations.pop(sta['mac'].lower(), None)
+
+            else:
+                bssid = data['AP']['mac'].lower()
+                sta_mac = data['Client']['mac'].lower()
+                ap = self._aps.get(bssid)
+                if ap is None:
+                    if tag == 'wifi.client.lost':
+                        # nothing to remove it from
+                        return False
+                    ap = _copy_ap(data['AP'])
+
+                # copy on write so that lists handed out before are never modified, the rest of the
+                # fields (rssi, encryption, ...) are refreshed with the ones of the event
+                ap = dict(data['AP'], clients=[sta for sta in ap['clients'] if sta['mac'].lower() != sta_mac])
+                if tag == 'wifi.client.new':
+                    ap['clients'].append(data['Client'])
+                    self._stations[sta_mac] = bssid
+                else:
+                    self._stations.pop(sta_mac, None)
+                self._aps[bssid] = ap
+
+        logging.debug("[aps] %s %s", tag, data['mac'] if 'mac' in data else data['Client']['mac'])
+        return True
+
+    def access_points(self):
+        with self._lock:
+            return list(self._aps.values())
+
+    def get(self, bssid):
+        with self._lock:
+            return self._aps.get(bssid.lower())
+
+    def ap_of(self, station_mac):
+        with self._lock:
+            bssid = self._stations.get(station_mac.lower())
+            return self._aps.get(bssid) if bssid is not None else None
+
+    def find(self, station_mac, ap_mac):
+        """
+        Returns the (ap, station) tuple or None if the access point is not known
+        """
+        ap = self.get(ap_mac)
+        if ap is None:
+            return None
+
+        station_mac = station_mac.lower()
+        for sta in ap['clients']:
+            if sta['mac'].lower() == station_mac:
+                return ap, sta
+
+        return ap, {'mac': station_mac, 'vendor': ''}
@@ -1,10 +1,20 @@
 import json
+import time
 import logging
+import asyncio
+import functools
+import threading
 import requests
 import websockets
 
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+# the agent main loop, the session fetcher, the event poller and the ai thread
+# can all talk to bettercap at the same time, keep one connection for each
+POOL_SIZE = 4
+
 
 def decode(r, verbose_errors=True):
     try:
@@ -20,8 +30,65 @@ def decode(r, verbose_errors=True):
         return r.text
 
 
+class SessionCache(object):
+    """
+    Shares one /api/session snapshot between all the threads asking for it, only one
+    fetch is in flight at any time and its result is reused until it's older than max_age
+    seconds or explicitly invalidated. Snapshots are shared, callers must not modify them.
+    """
+
+    def __init__(self, fetch, max_age=1.0):
+        self._fetch = fetch
+        self._max_age = max_age
+        self._cond = threading.Condition()
+        self._data = None
+        self._fetched_at = 0
+        self._fetching = False
+        self._generation = 0
+
+    def _is_fresh(self, max_age):
+        return self._data is not None and (time.time() - self._fetched_at) <= max_age
+
+    def get(self, max_age=None):
+        max_age = self._max_age if max_age is None else max_age
+
+        with self._cond:
+            while not self._is_fresh(max_age):
+                if not self._fetching:
+                    self._fetching = True
+                    generation = self._generation
+                    break
+                # someone else is fetching, wait for them and check again
+                self._cond.wait()
+            else:
+                return self._data
+
+        try:
+            data = self._fetch()
+        except Exception:
+            with self._cond:
+                self._fetching = False
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._data = data
+            # if the state changed while we were fetching, this snapshot is already old
+            self._fetched_at = time.time() if generation == self._generation else 0
+            self._fetching = False
+            self._cond.notify_all()
+
+        return data
+
+    def invalidate(self):
+        with self._cond:
+            self._generation += 1
+            self._fetched_at = 0
+
+
 class Client(object):
-    def __init__(self, hostname='localhost', scheme='http', port=8081, username='user', password='pass'):
+    def __init__(self, hostname='localhost', scheme='http', port=8081, username='user', password='pass',
+                 session_max_age=0.0):
         self.hostname = hostname
         self.scheme = scheme
         self.port = port
@@ -31,10 +98,54 @@ class Client(object):
         self.websocket = "ws://%s:%s@%s:%d/api" % (username, password, hostname, port)
         self.auth = HTTPBasicAuth(username, password)
 
-    def session(self):
-        r = requests.get("%s/session" % self.url, auth=self.auth)
+        # keep-alive connections shared by every thread using this client
+        self._http = requests.Session()
+        self._http.auth = self.auth
+        self._http.mount("%s://" % scheme, HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+
+        self._rpc_lock = threading.Lock()
+        self._rpc_stats = {
+            'calls': 0,
+            'commands': 0,
+            'total_ms': 0.0,
+            'last_ms': 0.0
+        }
+
+        self._session_cache = SessionCache(self._fetch_session, session_max_age)
+
+    def _track_rpc(self, started, num_commands):
+        elapsed = (time.time() - started) * 1000.0
+        with self._rpc_lock:
+            self._rpc_stats['calls'] += 1
+            self._rpc_stats['commands'] += num_commands
+            self._rpc_stats['total_ms'] += elapsed
+            self._rpc_stats['last_ms'] = elapsed
+        return elapsed
+
+    def rpc_stats(self):
+        """
+        Returns the number of round trips, the number of commands sent and their latency
+        """
+        with self._rpc_lock:
+            stats = dict(self._rpc_stats)
+        stats['avg_ms'] = stats['total_ms'] / stats['calls'] if stats['calls'] else 0.0
+        return stats
+
+    def _fetch_session(self):
+        started = time.time()
+        r = self._http.get("%s/session" % self.url)
+        self._track_rpc(started, 0)
         return decode(r)
 
+    def session(self, max_age=None):
+        """
+        Returns the (possibly cached) bettercap session, pass max_age=0 to force a new fetch
+        """
+        return self._session_cache.get(max_age)
+
+    def invalidate_session(self):
+        self._session_cache.invalidate()
+
     async def start_websocket(self, consumer):
         s = "%s/events" % self.websocket
         while True:
@@ -51,5 +162,76 @@ class Client(object):
                 logging.debug("Websocket exception (%s)", wex)
 
     def run(self, command, verbose_errors=True):
-        r = requests.post("%s/session" % self.url, auth=self.auth, json={'cmd': command})
+        started = time.time()
+        r = self._http.post("%s/session" % self.url, json={'cmd': command})
+        self._session_cache.invalidate()
+        elapsed = self._track_rpc(started, 1)
+        logging.debug("[bettercap] '%s' in %.1fms", command, elapsed)
+        return decode(r, verbose_errors=verbose_errors)
+
+    def run_many(self, commands, verbose_errors=True):
+        """
+        Sends several commands to bettercap within a single round trip, bettercap
+        executes them in order and stops at the first one that fails
+        """
+        commands = [c for c in commands if c]
+        if not commands:
+            return None
+
+        started = time.time()
+        r = self._http.post("%s/session" % self.url, json={'cmd': '; '.join(commands)})
+        self._session_cache.invalidate()
+        elapsed = self._track_rpc(started, len(commands))
+        logging.debug("[bettercap] %d commands in %.1fms", len(commands), elapsed)
         return decode(r, verbose_errors=verbose_errors)
+
+
+class AsyncClient(object):
+    """
+    asyncio front end for a Client, HTTP calls run on a small dedicated executor and share
+    the client keep-alive pool and session cache while events are read from the websocket
+    """
+
+    def __init__(self, client, max_workers=2):
+        self._client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bettercap')
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def session(self, max_age=None):
+        return await self._call(self._client.session, max_age)
+
+    async def run(self, command, verbose_errors=True):
+        return await self._call(self._client.run, command, verbose_errors=verbose_errors)
+
+    async def run_many(self, commands, verbose_errors=True):
+        return await self._call(self._client.run_many, commands, verbose_errors=verbose_errors)
+
+    async def events(self):
+        """
+        Yields every decoded event, reconnecting to the websocket when needed
+        """
+        s = "%s/events" % self._client.websocket
+        while True:
+            try:
+                async with websockets.connect(s, ping_interval=60, ping_timeout=90) as ws:
+                    async for msg in ws:
+                        try:
+                            jmsg = json.loads(msg)
+                        except ValueError as ex:
+                            logging.debug("Error while parsing event (%s)", ex)
+                            continue
+                        yield jmsg
+            except websockets.exceptions.ConnectionClosedError:
+                logging.debug("Lost websocket connection. Reconnecting...")
+            except websockets.exceptions.WebSocketException as wex:
+                logging.debug("Websocket exception (%s)", wex)
+                await asyncio.sleep(1)
+            except OSError as ex:
+                logging.debug("Websocket connection error (%s)", ex)
+                await asyncio.sleep(1)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
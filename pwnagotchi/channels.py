@@ -0,0 +1,142 @@
+import math
+import time
+import logging
+import threading
+
+# how much the statistics of past epochs still count in the current one
+DECAY = 0.95
+# relative value of the different kinds of feedback we get from a channel
+HANDSHAKE_VALUE = 1.0
+RESPONSE_VALUE = 0.05
+NEW_AP_VALUE = 0.02
+MISS_VALUE = -0.02
+# exploration constant of the UCB1 allocator
+EXPLORATION = 0.5
+
+
+class _Channel(object):
+    def __init__(self):
+        self.visits = 0.0
+        self.dwell = 0.0
+        self.handshakes = 0.0
+        self.responses = 0.0
+        self.misses = 0.0
+        self.new_aps = 0.0
+        self.known_aps = set()
+
+    def value(self):
+        return HANDSHAKE_VALUE * self.handshakes + \
+               RESPONSE_VALUE * self.responses + \
+               NEW_AP_VALUE * self.new_aps + \
+               MISS_VALUE * self.misses
+
+    def decay(self):
+        self.visits *= DECAY
+        self.dwell *= DECAY
+        self.handshakes *= DECAY
+        self.responses *= DECAY
+        self.misses *= DECAY
+        self.new_aps *= DECAY
+
+
+class ChannelStats(object):
+    """
+    Per channel handshakes, assoc/deauth responses, misses and access point churn across epochs,
+    used to scale the time spent on each channel with an UCB1 allocator on the yield per second.
+    """
+
+    def __init__(self, config):
+        self._config = config['main']['dwell']
+        self._enabled = self._config['enabled']
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._current = 0
+        self._since = time.time()
+        self._new_aps = 0
+        self._tot_aps = 0
+
+    def _get(self, ch):
+        if ch not in self._channels:
+            self._channels[ch] = _Channel()
+        return self._channels[ch]
+
+    def on_hop(self, ch):
+        now = time.time()
+        with self._lock:
+            if self._current != 0:
+                prev = self._get(self._current)
+                prev.visits += 1
+                prev.dwell += now - self._since
+            self._current = ch
+            self._since = now
+
+    def on_response(self, ch):
+        with self._lock:
+            self._get(ch).responses += 1
+
+    def on_miss(self, ch):
+        with self._lock:
+            self._get(ch).misses += 1
+
+    def on_handshake(self, ch):
+        with self._lock:
+            self._get(ch).handshakes += 1
+
+    def on_access_points(self, aps):
+        by_channel = {}
+        for ap in aps:
+            by_channel.setdefault(ap['channel'], set()).add(ap['mac'])
+
+        with self._lock:
+            self._new_aps, self._tot_aps = 0, len(aps)
+            for ch, macs in by_channel.items():
+                c = self._get(ch)
+                new = len(macs - c.known_aps)
+                c.new_aps += new
+                c.known_aps = macs
+                self._new_aps += new
+
+    def on_epoch(self):
+        with self._lock:
+            for c in self._channels.values():
+                c.decay()
+
+    def _ucb(self, c, total_visits):
+        mean = c.value() / max(c.dwell, 1.0)
+        return mean + EXPLORATION * math.sqrt(math.log(total_visits + 1.0) / c.visits)
+
+    def dwell(self, ch, base):
+        """
+        Returns how many seconds to stay on ch given the default base value
+        """
+        if not self._enabled or base <= 0:
+            return base
+
+        min_scale, max_scale = self._config['min_scale'], self._config['max_scale']
+        with self._lock:
+            visited = {n: c for n, c in self._channels.items() if c.visits >= 1.0}
+            if ch not in visited:
+                # never really seen this one, explore
+                return base * max_scale
+
+            total = sum(c.visits for c in visited.values())
+            scores = {n: self._ucb(c, total) for n, c in visited.items()}
+
+        avg = sum(scores.values()) / len(scores)
+        scale = scores[ch] / avg if avg > 0 else 1.0
+        scale = min(max(scale, min_scale), max_scale)
+        logging.debug("[channels] dwell on %d: %.1fs (x%.2f)", ch, base * scale, scale)
+        return base * scale
+
+    def recon_time(self, base):
+        """
+        Longer recon when the last one discovered many new access points, shorter when nothing changed
+        """
+        if not self._enabled:
+            return base
+
+        with self._lock:
+            churn = self._new_aps / self._tot_aps if self._tot_aps else 1.0
+
+        scale = min(max(0.5 + churn, self._config['min_scale']), self._config['max_scale'])
+        return base * scale
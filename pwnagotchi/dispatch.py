@@ -0,0 +1,190 @@
+import re
+import time
+import logging
+import threading
+from collections import deque
+
+# error 400: 50:c7:bf:2e:d3:37 is an unknown BSSID or it is in the association skip list.
+UNKNOWN_BSSID_PARSER = re.compile(r'([0-9a-fA-F]{2}(?::[0-9a-fA-F]{2}){5}) is an unknown BSSID')
+
+
+class TokenBucket(object):
+    def __init__(self, rate, burst):
+        self._rate = float(rate)
+        self._burst = max(float(burst), 1.0)
+        self._tokens = self._burst
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def take(self, n=1):
+        """
+        Blocks until n tokens have been consumed, returns the seconds spent waiting
+        """
+        waited = 0.0
+        while n > 0:
+            with self._lock:
+                self._refill()
+                want = min(n, self._burst)
+                if self._tokens >= want:
+                    self._tokens -= want
+                    n -= want
+                    continue
+                delay = (want - self._tokens) / self._rate
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    def available(self, n=1):
+        """
+        Returns True if n tokens could be taken right now without waiting
+        """
+        with self._lock:
+            self._refill()
+            return self._tokens >= min(n, self._burst)
+
+
+class Dispatcher(object):
+    """
+    Queues association and deauthentication commands per channel and sends them to bettercap
+    no faster than main.dispatch.rate frames per second, in batches when they're being throttled.
+    """
+
+    def __init__(self, client, config):
+        config = config['main']['dispatch']
+        self._client = client
+        self._bucket = TokenBucket(config['rate'], config['burst']) if config['rate'] > 0 else None
+        self._batch = max(config['batch'], 1)
+        self._max_queue = config['max_queue']
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._queues = {}
+        # notifications of the commands sent since the last flush
+        self._notifications = []
+        self._stats = {
+            'queued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'batches': 0,
+            'throttled_secs': 0.0
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = sum(len(q) for q in self._queues.values())
+        return stats
+
+    def submit(self, channel, command, callback, notify=None):
+        """
+        Queues command for channel. callback(error) is called as soon as it's been sent, for the
+        bookkeeping that must not lag behind, while notify() is only called at the end of the
+        flush. Returns True if the queue should be flushed now, either because the rate limit
+        lets the command through right away or because there's a full batch ready.
+        """
+        with self._lock:
+            queue = self._queues.setdefault(channel, deque())
+            if self._max_queue > 0 and len(queue) >= self._max_queue:
+                dropped, _, _ = queue.popleft()
+                self._stats['dropped'] += 1
+                logging.debug("[dispatch] queue for channel %d is full, dropping '%s'", channel, dropped)
+            queue.append((command, callback, notify))
+            pending = len(queue)
+
+        return pending >= self._batch or self._bucket is None or self._bucket.available(pending)
+
+    def flush(self, channel=0):
+        """
+        Sends everything queued for channel (or for any channel if 0) and drops the
+        commands queued for other channels since we're not there anymore, then calls
+        the notifications of whatever has been sent
+        """
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    for ch in list(self._queues.keys()):
+                        if channel != 0 and ch != channel and self._queues[ch]:
+                            logging.debug("[dispatch] dropping %d commands for channel %d", len(self._queues[ch]), ch)
+                            self._stats['dropped'] += len(self._queues[ch])
+                            self._queues[ch].clear()
+
+                    batch = []
+                    for queue in self._queues.values():
+                        while queue and len(batch) < self._batch:
+                            batch.append(queue.popleft())
+                        if len(batch) >= self._batch:
+                            break
+
+                if not batch:
+                    break
+
+                self._send(batch)
+
+            with self._lock:
+                notifications, self._notifications = self._notifications, []
+
+            for notify in notifications:
+                try:
+                    notify()
+                except Exception as e:
+                    logging.exception("[dispatch] error in notification (%s)", e)
+
+    def _done(self, items, error=None):
+        with self._lock:
+            self._stats['sent' if error is None else 'failed'] += len(items)
+            self._notifications.extend(notify for _, _, notify in items if notify is not None)
+        for _, callback, _ in items:
+            try:
+                callback(error)
+            except Exception as e:
+                logging.exception("[dispatch] error in callback (%s)", e)
+
+    @staticmethod
+    def _failed_at(batch, error):
+        m = UNKNOWN_BSSID_PARSER.search(str(error))
+        if m is not None:
+            mac = m.group(1).lower()
+            for idx, (command, _, _) in enumerate(batch):
+                if command.lower().endswith(mac):
+                    return idx
+        return None
+
+    def _send(self, batch):
+        if self._bucket is not None:
+            waited = self._bucket.take(len(batch))
+            with self._lock:
+                self._stats['throttled_secs'] += waited
+
+        with self._lock:
+            self._stats['batches'] += 1
+
+        try:
+            if len(batch) == 1:
+                self._client.run(batch[0][0])
+            else:
+                self._client.run_many([command for command, _, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._done(batch, e)
+                return
+
+            idx = self._failed_at(batch, e)
+            if idx is None:
+                # no idea which one failed, try them one by one
+                for item in batch:
+                    self._send([item])
+                return
+
+            # bettercap stops at the first command that fails
+            self._done(batch[:idx])
+            self._done(batch[idx:idx + 1], e)
+            if idx + 1 < len(batch):
+                self._send(batch[idx + 1:])
+            return
+
+        self._done(batch)
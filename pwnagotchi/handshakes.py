@@ -0,0 +1,193 @@
+import os
+import re
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_EVENT_HEADER = struct.Struct('iIII')
+
+# bettercap saves each handshake as <essid>_<bssid without colons>.pcap (or just the bssid for hidden networks)
+FILENAME_MAC_PARSER = re.compile(r'(?:^|_)([0-9a-fA-F]{12})\.pcap$')
+
+
+def mac_from_filename(filename):
+    m = FILENAME_MAC_PARSER.search(os.path.basename(filename))
+    if m is None:
+        return None
+    mac = m.group(1).lower()
+    return ':'.join(mac[i:i + 2] for i in range(0, 12, 2))
+
+
+class HandshakeIndex(object):
+    """
+    Set of the (lowercase) access point and client station MACs we already have a handshake for
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._macs = set()
+
+    def __contains__(self, mac):
+        return mac.lower() in self._macs
+
+    def __len__(self):
+        return len(self._macs)
+
+    def add(self, *macs):
+        with self._lock:
+            self._macs.update(mac.lower() for mac in macs if mac)
+
+    def add_key(self, key):
+        # recovery data keys are in the '<station> -> <ap>' format
+        self.add(*(part.strip() for part in key.split('->')))
+
+    def seed_from_keys(self, keys):
+        for key in keys:
+            self.add_key(key)
+
+    def seed_from_files(self, filenames):
+        macs = [mac for mac in map(mac_from_filename, filenames) if mac is not None]
+        self.add(*macs)
+        logging.debug("indexed %d handshakes", len(macs))
+
+
+class HandshakeCatalog(object):
+    """
+    Keeps the list of the pcap files inside a handshakes folder, updated by inotify
+    events when available or rescanned only when the folder modification time changes
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._files = set()
+        self._mtime = None
+        self._watching = False
+        # watch first and merge the scan with whatever the watch already reported, files
+        # written in between are then seen twice rather than never
+        self._watch()
+        self._rescan(merge=True)
+
+    def _rescan(self, merge=False):
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with os.scandir(self.path) as it:
+                files = set(entry.name for entry in it if entry.name.endswith('.pcap'))
+        except OSError as e:
+            logging.debug("could not scan %s: %s", self.path, e)
+            return
+
+        with self._lock:
+            if merge:
+                self._files.update(files)
+            else:
+                self._files = files
+            self._mtime = mtime
+
+    def _refresh(self):
+        if self._watching:
+            return
+        try:
+            if os.stat(self.path).st_mtime != self._mtime:
+                self._rescan()
+        except OSError:
+            pass
+
+    def _watch(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            mask = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF
+            if libc.inotify_add_watch(fd, self.path.encode(), mask) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+        except (OSError, AttributeError) as e:
+            logging.info("inotify not available for %s (%s), using mtime checks", self.path, e)
+            return
+
+        self._watching = True
+        threading.Thread(target=self._inotify_worker, args=(fd,), daemon=True).start()
+
+    def _inotify_worker(self, fd):
+        try:
+            while True:
+                data = os.read(fd, 64 * IN_EVENT_HEADER.size + 4096)
+                offset = 0
+                overflow, gone = False, False
+                added, removed = set(), set()
+                while offset < len(data):
+                    _, mask, _, size = IN_EVENT_HEADER.unpack_from(data, offset)
+                    offset += IN_EVENT_HEADER.size
+                    name = data[offset:offset + size].rstrip(b'\0').decode(errors='replace')
+                    offset += size
+
+                    if mask & IN_Q_OVERFLOW:
+                        overflow = True
+                    elif mask & (IN_DELETE_SELF | IN_IGNORED):
+                        gone = True
+                    elif name.endswith('.pcap'):
+                        if mask & (IN_DELETE | IN_MOVED_FROM):
+                            added.discard(name)
+                            removed.add(name)
+                        else:
+                            removed.discard(name)
+                            added.add(name)
+
+                if gone:
+                    break
+                elif overflow:
+                    # we lost some events, start from scratch
+                    self._rescan()
+                    continue
+
+                with self._lock:
+                    self._files.difference_update(removed)
+                    self._files.update(added)
+        except OSError as e:
+            logging.warning("error while watching %s: %s", self.path, e)
+        finally:
+            os.close(fd)
+
+        # the folder went away, go back to mtime checks
+        self._watching = False
+        self._mtime = None
+        self._refresh()
+
+    def count(self):
+        self._refresh()
+        with self._lock:
+            return len(self._files)
+
+    def files(self):
+        """
+        Returns the full path of every pcap file
+        """
+        self._refresh()
+        with self._lock:
+            return [os.path.join(self.path, name) for name in self._files]
+
+
+def catalog(path):
+    """
+    Returns the catalog shared by everyone looking at this handshakes folder
+    """
+    path = os.path.abspath(path)
+    with _catalogs_lock:
+        if path not in _catalogs:
+            _catalogs[path] = HandshakeCatalog(path)
+        return _catalogs[path]
@@ -0,0 +1,156 @@
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+
+class InteractionHistory(object):
+    """
+    How many times we interacted with each MAC address and when we last did. Counts decay
+    over time, least recently seen entries are evicted when over capacity or older than ttl
+    and the store is persisted as an append only journal of '<mac> <count> <last_seen>' lines
+    that only gets rewritten when it grows too much.
+    """
+
+    def __init__(self, path, max_entries=10000, ttl=7200, half_life=1800, clock=time.time):
+        self._path = path
+        self._clock = clock
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._half_life = half_life
+        self._lock = threading.Lock()
+        # mac -> [count, last_seen], from the least to the most recently seen
+        self._entries = OrderedDict()
+        self._dirty = set()
+        self._journal_lines = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, mac):
+        return mac in self._entries
+
+    def _decayed(self, count, last_seen, now):
+        if self._half_life <= 0:
+            return count
+        return count * 0.5 ** (max(now - last_seen, 0) / self._half_life)
+
+    def _evict(self, now):
+        while self._entries:
+            mac, (_, last_seen) = next(iter(self._entries.items()))
+            if len(self._entries) <= self._max_entries and (self._ttl <= 0 or now - last_seen <= self._ttl):
+                break
+            del self._entries[mac]
+            self._dirty.discard(mac)
+
+    def get(self, mac):
+        with self._lock:
+            entry = self._entries.get(mac)
+            return self._decayed(entry[0], entry[1], self._clock()) if entry is not None else 0.0
+
+    def interact(self, mac):
+        """
+        Records a new interaction with mac and returns a (first_time, decayed_count) tuple
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.pop(mac, None)
+            first = entry is None
+            count = 1.0 if first else self._decayed(entry[0], entry[1], now) + 1.0
+            self._entries[mac] = [count, now]
+            self._dirty.add(mac)
+            self._evict(now)
+        return first, count
+
+    @staticmethod
+    def _allows(first, count, max_interactions):
+        # decayed counts sit a little below the whole number of interactions, round them
+        # back up so that max_interactions allows as many of them as it always did
+        return first or math.ceil(count) < max_interactions
+
+    def should_interact(self, mac, max_interactions):
+        """
+        Records a new interaction with mac and returns True if it's the first one or if it's still
+        within max_interactions, the rule both the agent and the simulator follow
+        """
+        first, count = self.interact(mac)
+        return self._allows(first, count, max_interactions)
+
+    def can_interact(self, mac, max_interactions):
+        """
+        Returns what should_interact would, without recording anything
+        """
+        with self._lock:
+            entry = self._entries.get(mac)
+            if entry is None:
+                return True
+            count = self._decayed(entry[0], entry[1], self._clock()) + 1.0
+        return self._allows(False, count, max_interactions)
+
+    def update(self, counts):
+        # import the {mac: count} dictionaries of the old recovery data format
+        now = self._clock()
+        with self._lock:
+            for mac, count in counts.items():
+                self._entries.pop(mac, None)
+                self._entries[mac] = [float(count), now]
+                self._dirty.add(mac)
+            self._evict(now)
+
+    def load(self):
+        if not os.path.exists(self._path):
+            return
+
+        entries = {}
+        lines = 0
+        with open(self._path, 'rt') as fp:
+            for line in fp:
+                try:
+                    mac, count, last_seen = line.split()
+                    # later lines override older ones
+                    entries[mac] = [float(count), float(last_seen)]
+                    lines += 1
+                except ValueError:
+                    continue
+
+        now = self._clock()
+        with self._lock:
+            for mac, entry in sorted(entries.items(), key=lambda kv: kv[1][1]):
+                self._entries.pop(mac, None)
+                self._entries[mac] = entry
+            self._evict(now)
+            self._journal_lines = lines
+
+        logging.info("loaded %d interactions from %s", len(self._entries), self._path)
+
+    def _compact(self):
+        temp = "%s.tmp" % self._path
+        with open(temp, 'wt') as fp:
+            for mac, (count, last_seen) in self._entries.items():
+                fp.write("%s %.3f %d\n" % (mac, count, last_seen))
+        os.replace(temp, self._path)
+        self._journal_lines = len(self._entries)
+        self._dirty.clear()
+
+    def save(self):
+        """
+        Appends the entries changed since the last save to the journal, or rewrites it if it got too big
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            if self._journal_lines + len(self._dirty) > 2 * max(len(self._entries), self._max_entries // 10):
+                logging.debug("compacting %s ...", self._path)
+                self._compact()
+                return
+
+            with open(self._path, 'at') as fp:
+                for mac in self._dirty:
+                    if mac in self._entries:
+                        count, last_seen = self._entries[mac]
+                        fp.write("%s %.3f %d\n" % (mac, count, last_seen))
+                        self._journal_lines += 1
+            self._dirty.clear()
@@ -0,0 +1,168 @@
+import time
+import logging
+import threading
+from collections import deque, namedtuple
+
+STAT_PATH = '/proc/stat'
+MEMINFO_PATH = '/proc/meminfo'
+TEMPERATURE_PATH = '/sys/class/thermal/thermal_zone0/temp'
+FREQUENCY_PATH = '/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq'
+
+# cpu and mem are 0.0-1.0 ratios, temperature is in celsius and frequency in KHz,
+# any of them is None if the system doesn't expose it
+Sample = namedtuple('Sample', ('timestamp', 'cpu', 'mem', 'temperature', 'frequency'))
+
+
+def _open(path):
+    try:
+        return open(path, 'rt')
+    except OSError as e:
+        logging.debug("[metrics] %s not available: %s", path, e)
+        return None
+
+
+def _read(fp):
+    # procfs and sysfs files are regenerated on every read from the start
+    fp.seek(0)
+    return fp.read()
+
+
+class Sampler(object):
+    """
+    Samples cpu load, memory usage, temperature and cpu frequency every interval seconds from a
+    background thread into a ring buffer of size samples, keeping the procfs/sysfs files open, so
+    that readers get the latest, averaged or windowed values without ever blocking.
+    """
+
+    def __init__(self, interval=1.0, size=300):
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+        self._files = {path: _open(path) for path in (STAT_PATH, MEMINFO_PATH, TEMPERATURE_PATH, FREQUENCY_PATH)}
+        # cpu times since boot, so that the first sample is the average load since then
+        self._prev_cpu = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._sample()
+
+    def _reader(self, path, parse):
+        fp = self._files[path]
+        if fp is None:
+            return None
+        try:
+            return parse(_read(fp))
+        except Exception as e:
+            logging.debug("[metrics] error reading %s: %s", path, e)
+            return None
+
+    def _parse_cpu(self, data):
+        parts = list(map(int, data.split('\n', 1)[0].split()[1:]))
+        user, nice, sys, idle, iowait, irq, softirq, steal = (parts + [0] * 8)[:8]
+        idle_sum = idle + iowait
+        non_idle_sum = user + nice + sys + irq + softirq + steal
+
+        prev_idle, prev_non_idle = self._prev_cpu or (0, 0)
+        self._prev_cpu = (idle_sum, non_idle_sum)
+        total = (idle_sum - prev_idle) + (non_idle_sum - prev_non_idle)
+        return (non_idle_sum - prev_non_idle) / total if total > 0 else 0.0
+
+    @staticmethod
+    def _parse_mem(data):
+        fields = {}
+        for line in data.split('\n'):
+            parts = line.split()
+            if len(parts) >= 2:
+                fields[parts[0]] = int(parts[1])
+        total = fields['MemTotal:']
+        used = total - fields['MemFree:'] - fields['Cached:'] - fields['Buffers:']
+        return used / total
+
+    @staticmethod
+    def _parse_temperature(data):
+        return int(data.strip()) / 1000.0
+
+    @staticmethod
+    def _parse_frequency(data):
+        return int(data.strip())
+
+    def _sample(self):
+        sample = Sample(time.time(),
+                        self._reader(STAT_PATH, self._parse_cpu),
+                        self._reader(MEMINFO_PATH, self._parse_mem),
+                        self._reader(TEMPERATURE_PATH, self._parse_temperature),
+                        self._reader(FREQUENCY_PATH, self._parse_frequency))
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def _worker(self):
+        logging.debug("[metrics] sampling every %.1fs", self._interval)
+        while not self._stop.wait(self._interval):
+            self._sample()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name='metrics', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def latest(self):
+        with self._lock:
+            return self._samples[-1]
+
+    def window(self, secs=None):
+        """
+        Returns the samples of the last secs seconds, or all of them if secs is None
+        """
+        with self._lock:
+            samples = list(self._samples)
+        if secs is None:
+            return samples
+        since = time.time() - secs
+        return [s for s in samples if s.timestamp >= since] or samples[-1:]
+
+    def average(self, field, secs=None):
+        values = [getattr(s, field) for s in self.window(secs)]
+        values = [v for v in values if v is not None]
+        return sum(values) / len(values) if values else None
+
+    def get(self, field, secs=None):
+        """
+        Returns the latest value of field if secs is None, else its average over the last secs seconds
+        """
+        if secs is None:
+            return getattr(self.latest(), field)
+        return self.average(field, secs)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def setup(config):
+    """
+    (Re)creates the sampler with the main.metrics configuration
+    """
+    global _sampler
+
+    cfg = config['main']['metrics']
+    with _sampler_lock:
+        if _sampler is not None:
+            _sampler.stop()
+        _sampler = Sampler(interval=cfg['interval'], size=cfg['size']).start()
+    return _sampler
+
+
+def sampler():
+    """
+    Returns the running sampler, started with the default settings if setup was not called
+    """
+    global _sampler
+
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = Sampler().start()
+        return _sampler
@@ -78,6 +78,18 @@ class Example(plugins.Plugin):
     def on_ai_training_end(self, agent):
         pass
 
+    # called when the AI skips a training episode because the unit is too hot, busy or low on battery
+    def on_ai_training_deferred(self, agent, reason):
+        pass
+
+    # called when the AI trains for less epochs than ai.epochs_per_episode because the unit is warm
+    def on_ai_training_shrunk(self, agent, epochs, reason):
+        pass
+
+    # called when the AI stops a training episode before its end
+    def on_ai_training_paused(self, agent, reason):
+        pass
+
     # called when the AI got the best reward so far
     def on_ai_best_reward(self, agent, reward):
         pass
@@ -119,6 +131,8 @@ class Example(plugins.Plugin):
         pass
 
     # called when the agent refreshed its access points list
+    # access_points is an immutable AccessPointSnapshot (a tuple sorted by channel) shared with the agent,
+    # use list(access_points) if you need to modify it
     def on_wifi_update(self, agent, access_points):
         pass
 
@@ -1,10 +1,10 @@
 import os
 import logging
 import time
-import glob
 import re
 
 import pwnagotchi.grid as grid
+import pwnagotchi.handshakes as handshakes
 import pwnagotchi.plugins as plugins
 from pwnagotchi.utils import StatusFile, WifiInfo, extract_from_pcap
 from threading import Lock
@@ -87,7 +87,7 @@ class Grid(plugins.Plugin):
     def check_handshakes(self, agent):
         logging.debug("checking pcaps")
 
-        pcap_files = glob.glob(os.path.join(agent.config()['bettercap']['handshakes'], "*.pcap"))
+        pcap_files = handshakes.catalog(agent.config()['bettercap']['handshakes']).files()
         num_networks = len(pcap_files)
         reported = self.report.data_field_or('reported', default=[])
         num_reported = len(reported)
@@ -72,8 +72,7 @@ class MemTemp(plugins.Plugin):
         return f"{temp}{symbol}"
 
     def cpu_freq(self):
-        with open('/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq', 'rt') as fp:
-            return f"{round(float(fp.readline())/1000000, 1)}G"
+        return f"{round(pwnagotchi.cpu_freq() / 1000000, 1)}G"
 
     def pad_text(self, data):
         return " " * (self.FIELD_WIDTH - len(data)) + data
@@ -7,6 +7,7 @@ from datetime import datetime
 from threading import Lock
 from pwnagotchi.utils import StatusFile, remove_whitelisted
 import pwnagotchi.plugins as plugins
+import pwnagotchi.handshakes as handshakes
 from json.decoder import JSONDecodeError
 
 
@@ -101,9 +102,7 @@ class OnlineHashCrack(plugins.Plugin):
             config = agent.config()
             reported = self.report.data_field_or('reported', default=list())
             handshake_dir = config['bettercap']['handshakes']
-            handshake_filenames = os.listdir(handshake_dir)
-            handshake_paths = [os.path.join(handshake_dir, filename) for filename in handshake_filenames if
-                               filename.endswith('.pcap')]
+            handshake_paths = handshakes.catalog(handshake_dir).files()
             # pull out whitelisted APs
             handshake_paths = remove_whitelisted(handshake_paths, self.options['whitelist'])
             handshake_new = set(handshake_paths) - set(reported) - set(self.skip)
@@ -5,6 +5,7 @@ from datetime import datetime
 from threading import Lock
 from pwnagotchi.utils import StatusFile, remove_whitelisted
 from pwnagotchi import plugins
+from pwnagotchi import handshakes
 from json.decoder import JSONDecodeError
 
 
@@ -102,9 +103,7 @@ class WpaSec(plugins.Plugin):
             display = agent.view()
             reported = self.report.data_field_or('reported', default=list())
             handshake_dir = config['bettercap']['handshakes']
-            handshake_filenames = os.listdir(handshake_dir)
-            handshake_paths = [os.path.join(handshake_dir, filename) for filename in handshake_filenames if
-                               filename.endswith('.pcap')]
+            handshake_paths = handshakes.catalog(handshake_dir).files()
             handshake_paths = remove_whitelisted(handshake_paths, self.options['whitelist'])
             handshake_new = set(handshake_paths) - set(reported) - set(self.skip)
 
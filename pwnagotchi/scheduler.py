@@ -0,0 +1,175 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from pwnagotchi.aps import AccessPointSnapshot
+
+# how many access points we keep attack statistics for
+MAX_TRACKED = 5000
+# rough duration of an assoc/deauth round trip when we have no measurement yet
+DEFAULT_RPC_SECS = 0.05
+
+RSSI_WEIGHT = 0.4
+CLIENTS_WEIGHT = 0.3
+SUCCESS_WEIGHT = 0.3
+
+
+def _norm_rssi(rssi):
+    # -100dBm is as good as nothing, -30dBm is as good as it gets
+    return min(max((rssi + 100) / 70.0, 0.0), 1.0)
+
+
+class Scheduler(object):
+    """
+    Decides which access points and client stations to attack during an epoch and in which order,
+    this one is the original behaviour: everything, grouped by channel, busiest channels first.
+    """
+
+    def __init__(self, config):
+        self._config = config
+
+    def on_attack(self, ap_mac):
+        pass
+
+    def on_handshake(self, ap_mac):
+        pass
+
+    def _allowed_channel(self, ch):
+        # if we're sticking to a channel, skip anything
+        # which is not on that channel
+        channels = self._config['personality']['channels']
+        return not channels or ch in channels
+
+    def plan(self, agent, aps):
+        """
+        Returns a list of (channel, [ap, ...]) tuples, each ap with the client stations to deauth and,
+        when it must not be associated with, an 'associate' field set to False
+        """
+        if not isinstance(aps, AccessPointSnapshot):
+            aps = AccessPointSnapshot(aps)
+
+        # already grouped by channel
+        grouped = {ch: list(group) for ch, group in aps.by_channel.items() if self._allowed_channel(ch)}
+
+        # sort by more populated channels
+        return sorted(grouped.items(), key=lambda kv: len(kv[1]), reverse=True)
+
+
+class ScoreScheduler(Scheduler):
+    """
+    Ranks every (channel, access point, station) work item by signal strength, number of clients
+    and past success on that access point, then picks the best channels and items that fit
+    within main.scheduler.budget seconds.
+    """
+
+    def __init__(self, config):
+        super(ScoreScheduler, self).__init__(config)
+        self._budget = config['main']['scheduler']['budget']
+        self._lock = threading.Lock()
+        # bssid -> [attacks, handshakes]
+        self._stats = OrderedDict()
+
+    def _track(self, ap_mac, attacks=0, handshakes=0):
+        ap_mac = ap_mac.lower()
+        with self._lock:
+            entry = self._stats.pop(ap_mac, [0, 0])
+            entry[0] += attacks
+            entry[1] += handshakes
+            self._stats[ap_mac] = entry
+            while len(self._stats) > MAX_TRACKED:
+                self._stats.popitem(last=False)
+
+    def on_attack(self, ap_mac):
+        self._track(ap_mac, attacks=1)
+
+    def on_handshake(self, ap_mac):
+        self._track(ap_mac, handshakes=1)
+
+    def _success_rate(self, ap_mac):
+        with self._lock:
+            attacks, handshakes = self._stats.get(ap_mac.lower(), (0, 0))
+        # laplace smoothing, never attacked means 50%
+        return (handshakes + 1.0) / (attacks + 2.0)
+
+    def _score(self, rssi, num_clients, success):
+        return RSSI_WEIGHT * _norm_rssi(rssi) + \
+               CLIENTS_WEIGHT * min(num_clients, 10) / 10.0 + \
+               SUCCESS_WEIGHT * success
+
+    def _rank(self, agent, ap):
+        personality = self._config['personality']
+        success = self._success_rate(ap['mac'])
+        items = []
+
+        if personality['associate'] and agent.can_interact(ap['mac']):
+            items.append((self._score(ap['rssi'], len(ap['clients']), success), None))
+
+        if personality['deauth']:
+            for sta in ap['clients']:
+                if agent.can_interact(sta['mac']):
+                    items.append((self._score(sta.get('rssi', ap['rssi']), 1, success), sta))
+
+        return items
+
+    def plan(self, agent, aps):
+        personality = self._config['personality']
+        stats = agent.rpc_stats()
+        rpc_cost = stats['avg_ms'] / 1000.0 if stats['calls'] else DEFAULT_RPC_SECS
+
+        if not isinstance(aps, AccessPointSnapshot):
+            aps = AccessPointSnapshot(aps)
+
+        channels = {}
+        for ch, group in aps.by_channel.items():
+            if not self._allowed_channel(ch):
+                continue
+            for ap in group:
+                for score, sta in self._rank(agent, ap):
+                    channels.setdefault(ch, []).append((score, ap, sta))
+
+        ranked = []
+        for ch, items in channels.items():
+            items.sort(key=lambda item: item[0], reverse=True)
+            with_deauths = any(sta is not None for _, _, sta in items)
+            hop_cost = personality['hop_recon_time'] if with_deauths else personality['min_recon_time']
+            hop_cost = agent.dwell(ch, hop_cost)
+            value = sum(score for score, _, _ in items)
+            cost = hop_cost + len(items) * rpc_cost
+            ranked.append((value / cost, ch, hop_cost, items))
+
+        ranked.sort(key=lambda c: c[0], reverse=True)
+
+        budget = self._budget if self._budget > 0 else float('inf')
+        plan = []
+        num_items = 0
+        for _, ch, hop_cost, items in ranked:
+            if budget < hop_cost + rpc_cost:
+                continue
+            budget -= hop_cost
+
+            # keep the access points in the order of their best item
+            selected = OrderedDict()
+            for score, ap, sta in items:
+                if budget < rpc_cost:
+                    break
+                budget -= rpc_cost
+                num_items += 1
+                if ap['mac'] not in selected:
+                    selected[ap['mac']] = dict(ap, clients=[], associate=False)
+                if sta is None:
+                    selected[ap['mac']]['associate'] = True
+                else:
+                    selected[ap['mac']]['clients'].append(sta)
+
+            if selected:
+                plan.append((ch, list(selected.values())))
+
+        logging.debug("[scheduler] %d work items on %d channels out of %d available",
+                      num_items, len(plan), len(ranked))
+        return plan
+
+
+def scheduler_for(config):
+    if config['main']['scheduler']['type'] == 'score':
+        return ScoreScheduler(config)
+    return Scheduler(config)
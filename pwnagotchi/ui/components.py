@@ -1,15 +1,52 @@
+import math
+
 from PIL import Image
-from textwrap import TextWrapper
+
+import pwnagotchi.ui.textcache as textcache
+
+
+def box(xy, pad=0):
+    """
+    Integer (x0, y0, x1, y1) box containing the points xy, either [x, y, ...] or [(x, y), ...], x1 and y1 excluded
+    """
+    if xy and isinstance(xy[0], (tuple, list)):
+        xy = [c for point in xy for c in point]
+    xs, ys = xy[0::2], xy[1::2]
+    return (int(math.floor(min(xs))) - pad, int(math.floor(min(ys))) - pad,
+            int(math.ceil(max(xs))) + 1 + pad, int(math.ceil(max(ys))) + 1 + pad)
+
+
+def union(a, b):
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
 
 
 class Widget(object):
+    # set when xy changes, so that the widget gets redrawn where it was and where it is now
+    moved = False
+
     def __init__(self, xy, color=0):
         self.xy = xy
         self.color = color
 
+    @property
+    def xy(self):
+        return self._xy
+
+    @xy.setter
+    def xy(self, xy):
+        if hasattr(self, '_xy') and xy != self._xy:
+            self.moved = True
+        self._xy = xy
+
     def draw(self, canvas, drawer):
         raise Exception("not implemented")
 
+    def bbox(self, drawer):
+        """
+        Returns the (x0, y0, x1, y1) box the widget draws into, or None if it can't tell
+        """
+        return None
+
 
 class Bitmap(Widget):
     def __init__(self, path, xy, color=0):
@@ -19,6 +56,11 @@ class Bitmap(Widget):
     def draw(self, canvas, drawer):
         canvas.paste(self.image, self.xy)
 
+    def bbox(self, drawer):
+        w, h = self.image.size
+        x, y = self.xy
+        return box((x, y, x + w - 1, y + h - 1))
+
 
 class Line(Widget):
     def __init__(self, xy, color=0, width=1):
@@ -28,16 +70,25 @@ class Line(Widget):
     def draw(self, canvas, drawer):
         drawer.line(self.xy, fill=self.color, width=self.width)
 
+    def bbox(self, drawer):
+        return box(self.xy, pad=self.width)
+
 
 class Rect(Widget):
     def draw(self, canvas, drawer):
         drawer.rectangle(self.xy, outline=self.color)
 
+    def bbox(self, drawer):
+        return box(self.xy)
+
 
 class FilledRect(Widget):
     def draw(self, canvas, drawer):
         drawer.rectangle(self.xy, fill=self.color)
 
+    def bbox(self, drawer):
+        return box(self.xy)
+
 
 class Text(Widget):
     def __init__(self, value="", position=(0, 0), font=None, color=0, wrap=False, max_length=0):
@@ -46,15 +97,21 @@ class Text(Widget):
         self.font = font
         self.wrap = wrap
         self.max_length = max_length
-        self.wrapper = TextWrapper(width=self.max_length, replace_whitespace=False) if wrap else None
+
+    def _width(self):
+        # the cache does the wrapping too
+        return self.max_length if self.wrap else 0
 
     def draw(self, canvas, drawer):
         if self.value is not None:
-            if self.wrap:
-                text = '\n'.join(self.wrapper.wrap(self.value))
-            else:
-                text = self.value
-            drawer.text(self.xy, text, font=self.font, fill=self.color)
+            textcache.cache().draw(drawer, self.xy, self.value, self.font, self.color, self._width())
+
+    def bbox(self, drawer):
+        x, y = self.xy
+        if not self.value:
+            # nothing to draw
+            return int(x), int(y), int(x), int(y)
+        return textcache.cache().bbox(self.xy, self.value, self.font, self._width())
 
 
 class LabeledValue(Widget):
@@ -66,10 +123,20 @@ class LabeledValue(Widget):
         self.text_font = text_font
         self.label_spacing = label_spacing
 
+    def _value_xy(self):
+        return self.xy[0] + self.label_spacing + 5 * len(self.label), self.xy[1]
+
     def draw(self, canvas, drawer):
+        cache = textcache.cache()
         if self.label is None:
-            drawer.text(self.xy, self.value, font=self.label_font, fill=self.color)
+            cache.draw(drawer, self.xy, self.value, self.label_font, self.color)
         else:
-            pos = self.xy
-            drawer.text(pos, self.label, font=self.label_font, fill=self.color)
-            drawer.text((pos[0] + self.label_spacing + 5 * len(self.label), pos[1]), self.value, font=self.text_font, fill=self.color)
+            cache.draw(drawer, self.xy, self.label, self.label_font, self.color)
+            cache.draw(drawer, self._value_xy(), self.value, self.text_font, self.color)
+
+    def bbox(self, drawer):
+        cache = textcache.cache()
+        if self.label is None:
+            return cache.bbox(self.xy, self.value, self.label_font)
+        return union(cache.bbox(self.xy, self.label, self.label_font),
+                     cache.bbox(self._value_xy(), self.value, self.text_font))
@@ -4,6 +4,7 @@ import threading
 
 import pwnagotchi.plugins as plugins
 import pwnagotchi.ui.hw as hw
+import pwnagotchi.ui.web as web
 from pwnagotchi.ui.view import View
 
 
@@ -19,6 +20,9 @@ class Display(View):
 
         self._canvas_next_event = threading.Event()
         self._canvas_next = None
+        # regions changed since the last frame the render thread picked up, None for all of them
+        self._regions_lock = threading.Lock()
+        self._regions_next = []
         self._render_thread_instance = threading.Thread(
             target=self._render_thread,
             daemon=True
@@ -88,7 +92,7 @@ class Display(View):
             plugins.on('display_setup', self._implementation)
         else:
             logging.warning("display module is disabled")
-        self.on_render(self._on_view_rendered)
+        self.on_render(self._on_view_rendered, regions=True)
 
     def clear(self):
         self._implementation.clear()
@@ -105,11 +109,16 @@ class Display(View):
         while True:
             self._canvas_next_event.wait()
             self._canvas_next_event.clear()
-            self._implementation.render(self._canvas_next)
+            with self._regions_lock:
+                canvas, regions = self._canvas_next, self._regions_next
+                self._regions_next = []
+            self._implementation.render(canvas, regions=regions)
 
-    def _on_view_rendered(self, img):
+    def _on_view_rendered(self, img, regions=None):
         try:
             if self._config['ui']['web']['on_frame'] != '':
+                # the command expects the frame on disk, only case it's ever written there
+                web.save_frame()
                 os.system(self._config['ui']['web']['on_frame'])
         except Exception as e:
             logging.error("%s" % e)
@@ -117,5 +126,11 @@ class Display(View):
         if self._enabled:
             self._canvas = (img if self._rotation == 0 else img.rotate(self._rotation))
             if self._implementation is not None:
-                self._canvas_next = self._canvas
+                with self._regions_lock:
+                    self._canvas_next = self._canvas
+                    # frames the render thread didn't get to yet are skipped, but not their regions
+                    if regions is None or self._rotation != 0 or self._regions_next is None:
+                        self._regions_next = None
+                    else:
+                        self._regions_next.extend(regions)
                 self._canvas_next_event.set()
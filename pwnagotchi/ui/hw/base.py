@@ -33,7 +33,8 @@ class DisplayImpl(object):
     def initialize(self):
         raise NotImplementedError
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
+        # regions: list of (x0, y0, x1, y1) boxes that changed since the last frame, None if unknown
         raise NotImplementedError
 
     def clear(self):
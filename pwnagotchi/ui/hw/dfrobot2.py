@@ -35,7 +35,7 @@ class DFRobotV2(DisplayImpl):
     from pwnagotchi.ui.hw.libs.dfrobot.v2.dfrobot import DFRobot
     self._display = DFRobot()
 
-  def render(self, canvas):
+  def render(self, canvas, regions=None):
     buf = self._display.getbuffer(canvas)
     self._display.display(buf)
 
@@ -53,7 +53,7 @@ class Inky(DisplayImpl):
             self._display = InkyPHAT(self.config['color'])
             self._display.set_border(InkyPHAT.BLACK)
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         if self.config['color'] == 'black' or self.config['color'] == 'fastAndFurious':
             display_colors = 2
         else:
@@ -39,7 +39,7 @@ class LcdHat(DisplayImpl):
         self._display.init()
         self._display.clear()
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         self._display.display(canvas)
 
     def clear(self):
@@ -2,6 +2,7 @@
 
 import logging
 from . import dfrobot_epaper
+import pwnagotchi.ui.hw.libs.packing as packing
 
 #Resolution of display
 WIDTH = 250
@@ -22,31 +23,7 @@ class DFRobot:
     self.PART = self._display.PART
 
   def getbuffer(self, image):
-    if HEIGHT % 8 == 0:
-      linewidth = HEIGHT // 8
-    else:
-      linewidth = HEIGHT // 8 + 1
-
-    buf = [0xFF] * (linewidth * WIDTH)
-    image_monocolor = image.convert('1')
-    imwidth, imheight = image_monocolor.size
-    pixels = image_monocolor.load()
-
-    if (imwidth == HEIGHT and imheight == WIDTH):
-      for y in range(imheight):
-        for x in range(imwidth):
-          if pixels[x,y] == 0:
-            x = imwidth - x
-            buf[x // 8 + y * linewidth] &= ~(0x80 >> (x % 8))
-    elif (imwidth == WIDTH and imheight == HEIGHT):
-      for y in range(imheight):
-        for x in range(imwidth):
-          newx = y
-          newy = WIDTH - x - 1
-          if pixels[x,y] == 0:
-            newy = imwidth - newy - 1
-            buf[newx // 8 + newy * linewidth] &= ~(0x80 >> (y % 8))
-    return buf
+    return packing.mirrored_rows(image, HEIGHT, WIDTH)
   
   def flush(self, type):
     self._display.flush(type)
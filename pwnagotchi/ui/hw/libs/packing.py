@@ -0,0 +1,75 @@
+# Packs PIL images into the framebuffers of the 1-bit displays, with whole image operations
+# instead of looping over every pixel in python. Every function returns exactly the bytes
+# the per-pixel loops of the drivers used to build, see scripts/bench_packing.py.
+
+import numpy as np
+from PIL import Image
+
+
+def _stride(width):
+    return (width + 7) // 8
+
+
+def _blank(width, height):
+    return bytearray([0xFF]) * (_stride(width) * height)
+
+
+def _padded(image, width, height, x=0):
+    """
+    Pastes image on a white canvas as wide as the rows of the framebuffer, the padding bits must stay white
+    """
+    if image.size == (_stride(width) * 8, height) and x == 0:
+        return image
+    canvas = Image.new('1', (_stride(width) * 8, height), 255)
+    canvas.paste(image, (x, 0))
+    return canvas
+
+
+def rows(image, width, height):
+    """
+    Rows of width pixels, most significant bit first, 1 for white. Landscape images
+    (height x width) are rotated counterclockwise, images of any other size give a white buffer.
+    """
+    image = image.convert('1')
+    if image.size != (width, height):
+        if image.size != (height, width):
+            return _blank(width, height)
+        image = image.transpose(Image.ROTATE_90)
+    return bytearray(_padded(image, width, height).tobytes())
+
+
+def mirrored_rows(image, width, height):
+    """
+    As rows, but portrait images are mirrored (and shifted right by one pixel, as the panel
+    expects them) while landscape ones are transposed.
+    """
+    image = image.convert('1')
+    if image.size == (width, height):
+        return bytearray(_padded(image.transpose(Image.FLIP_LEFT_RIGHT), width, height, x=1).tobytes())
+    elif image.size == (height, width):
+        return bytearray(_padded(image.transpose(Image.TRANSPOSE), width, height).tobytes())
+    return _blank(width, height)
+
+
+def _white(image):
+    w, h = image.size
+    bits = np.unpackbits(np.frombuffer(image.tobytes(), dtype=np.uint8))
+    return bits.reshape(h, -1)[:, :w].astype(bool)
+
+
+def pages(image, width, height):
+    """
+    Pages of 8 rows, one byte per column with the top row as least significant bit, 1 for white.
+    Landscape images (height x width) are rotated counterclockwise, but only the bit of the column
+    index (modulo 8) is ever cleared in each byte, as the SH1106 driver always did.
+    """
+    image = image.convert('1')
+    if image.size == (width, height):
+        white = _white(image).reshape(height // 8, 8, width).transpose(0, 2, 1)
+        return bytearray(np.packbits(white, axis=-1, bitorder='little').tobytes())
+    elif image.size == (height, width):
+        white = _white(image.transpose(Image.ROTATE_90))
+        black = ~white.reshape(height // 8, 8, width).all(axis=1)
+        bits = (1 << (np.arange(width) % 8)).astype(np.uint8)
+        return bytearray((0xFF ^ (black * bits)).astype(np.uint8).tobytes())
+    return bytearray([0xFF]) * (width // 8 * height)
@@ -1,4 +1,5 @@
 from . import config
+import pwnagotchi.ui.hw.libs.packing as packing
 import RPi.GPIO as GPIO
 import time
 
@@ -74,30 +75,7 @@ class SH1106(object):
         time.sleep(0.1)
 
     def getbuffer(self, image):
-        # print "bufsiz = ",(self.width/8) * self.height
-        buf = [0xFF] * ((self.width//8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # print "imwidth = %d, imheight = %d",imwidth,imheight
-        if(imwidth == self.width and imheight == self.height):
-            #print ("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[x + (y // 8) * self.width] &= ~(1 << (y % 8))
-                        # print x,y,x + (y * self.width)/8,buf[(x + y * self.width) / 8]
-
-        elif(imwidth == self.height and imheight == self.width):
-            #print ("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[(newx + (newy // 8 )*self.width) ] &= ~(1 << (y % 8))
-        return buf
+        return packing.pages(image, self.width, self.height)
 
 
     # def ShowImage(self,Image):
@@ -49,6 +49,7 @@ import time
 import spidev
 import RPi.GPIO as GPIO
 from PIL import Image
+import pwnagotchi.ui.hw.libs.packing as packing
 
 # Pin definition
 RST_PIN = 17
@@ -257,33 +258,7 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        if self.width % 8 == 0:
-            linewidth = self.width // 8
-        else:
-            linewidth = self.width // 8 + 1
-
-        buf = [0xFF] * (linewidth * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-
-        if (imwidth == self.width and imheight == self.height):
-            # print("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    if pixels[x, y] == 0:
-                        x = imwidth - x
-                        buf[x // 8 + y * linewidth] &= ~(0x80 >> (x % 8))
-        elif (imwidth == self.height and imheight == self.width):
-            # print("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        newy = imwidth - newy - 1
-                        buf[newx // 8 + newy * linewidth] &= ~(0x80 >> (y % 8))
-        return buf
+        return packing.mirrored_rows(image, self.width, self.height)
 
     def display(self, image):
         if self.width % 8 == 0:
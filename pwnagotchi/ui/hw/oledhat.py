@@ -38,7 +38,7 @@ class OledHat(DisplayImpl):
         self._display.init()
         self._display.Clear()
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         self._display.display(canvas)
 
     def clear(self):
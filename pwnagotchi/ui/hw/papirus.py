@@ -39,7 +39,7 @@ class Papirus(DisplayImpl):
         self._display = EPD()
         self._display.clear()
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         self._display.display(canvas)
         self._display.partial_update()
 
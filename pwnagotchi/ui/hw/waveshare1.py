@@ -75,7 +75,7 @@ class WaveshareV1(DisplayImpl):
             self._display.init()
             self._display.Clear()
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         if self.config['color'] == 'black':
             buf = self._display.getbuffer(canvas)
             self._display.display(buf)
@@ -61,7 +61,7 @@ class WaveshareV2(DisplayImpl):
         self._display.Clear(0xff)
         self._display.init(self._display.PART_UPDATE)
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         buf = self._display.getbuffer(canvas)
         self._display.displayPartial(buf)
 
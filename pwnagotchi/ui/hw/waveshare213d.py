@@ -38,7 +38,7 @@ class Waveshare213d(DisplayImpl):
         self._display.init()
         self._display.Clear()
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         buf = self._display.getbuffer(canvas)
         self._display.display(buf)
 
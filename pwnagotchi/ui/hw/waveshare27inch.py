@@ -38,7 +38,7 @@ class Waveshare27inch(DisplayImpl):
         self._display.init()
         self._display.Clear(0xFF)
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         buf = self._display.getbuffer(canvas)
         self._display.display(buf)
 
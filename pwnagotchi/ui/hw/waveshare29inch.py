@@ -39,7 +39,7 @@ class Waveshare29inch(DisplayImpl):
         self._display.Clear(0xFF)
         self._display.init(self._display.lut_partial_update)
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         buf = self._display.getbuffer(canvas)
         self._display.display(buf)
 
@@ -39,7 +39,7 @@ class WaveshareV3(DisplayImpl):
         self._display.init()
         self._display.Clear(0xFF)
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         buf = self._display.getbuffer(canvas)
         self._display.displayPartial(buf)
 
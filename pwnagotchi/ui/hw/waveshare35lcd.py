@@ -43,7 +43,7 @@ class Waveshare35lcd(DisplayImpl):
         self._display.ready_fb(i=1)
         self._display.black_scr()
 
-    def render(self, canvas):
+    def render(self, canvas, regions=None):
         self._display.show_img(canvas.rotate(0))
         self.refresh()
 
@@ -31,21 +31,27 @@ class State(object):
         with self._lock:
             return self._state[key].value if key in self._state else None
 
+    def _moved(self):
+        # widgets moved by assigning their xy directly
+        return [key for key, elem in self._state.items() if getattr(elem, 'moved', False)]
+
     def reset(self):
         with self._lock:
             self._changes = {}
+            for key in self._moved():
+                self._state[key].moved = False
 
     def changes(self, ignore=()):
         with self._lock:
             changes = []
-            for change in self._changes.keys():
-                if change not in ignore:
+            for change in list(self._changes.keys()) + self._moved():
+                if change not in ignore and change not in changes:
                     changes.append(change)
             return changes
 
     def has_changes(self):
         with self._lock:
-            return len(self._changes) > 0
+            return len(self._changes) > 0 or len(self._moved()) > 0
 
     def set(self, key, value):
         with self._lock:
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from textwrap import TextWrapper
+
+from PIL import Image, ImageDraw
+
+
+def _text_bbox(drawer, text, font):
+    if hasattr(drawer, 'textbbox'):
+        return drawer.textbbox((0, 0), text, font=font)
+    w, h = drawer.textsize(text, font=font)
+    return 0, 0, w, h
+
+
+class TextCache(object):
+    """
+    Bounded LRU cache of 1-bit text bitmaps keyed by (text, font, wrap width), faces, labels and
+    status messages repeat all the time and pasting them is way cheaper than rasterizing them again.
+    """
+
+    def __init__(self, size=128):
+        self._size = size
+        self._lock = threading.Lock()
+        # (text, font, width) -> (mask or None if there's nothing to draw, x offset, y offset)
+        self._entries = OrderedDict()
+        # only used to measure text
+        self._drawer = ImageDraw.Draw(Image.new('1', (1, 1)))
+        self.hits = 0
+        self.misses = 0
+
+    def _rasterize(self, text, font, width):
+        if width > 0:
+            text = '\n'.join(TextWrapper(width=width, replace_whitespace=False).wrap(text))
+
+        x0, y0, x1, y1 = _text_bbox(self._drawer, text, font)
+        if x1 <= x0 or y1 <= y0:
+            return None, x0, y0
+
+        mask = Image.new('1', (x1 - x0, y1 - y0), 0)
+        ImageDraw.Draw(mask).text((-x0, -y0), text, font=font, fill=255)
+        return mask, x0, y0
+
+    def get(self, text, font, width=0):
+        key = (text, font, width)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._rasterize(text, font, width)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def draw(self, drawer, xy, text, font, fill, width=0):
+        mask, x0, y0 = self.get(text, font, width)
+        if mask is not None:
+            drawer.bitmap((int(xy[0]) + x0, int(xy[1]) + y0), mask, fill=fill)
+
+    def bbox(self, xy, text, font, width=0):
+        """
+        Returns the (x0, y0, x1, y1) box the text is drawn into at xy
+        """
+        mask, x0, y0 = self.get(text, font, width)
+        x, y = int(xy[0]) + x0, int(xy[1]) + y0
+        if mask is None:
+            return x, y, x, y
+        w, h = mask.size
+        return x, y, x + w, y + h
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'size': self._size,
+            }
+
+
+_cache = TextCache()
+
+
+def setup(config):
+    global _cache
+    _cache = TextCache(config['ui']['text_cache']['size'])
+
+
+def cache():
+    return _cache
@@ -1,4 +1,5 @@
 import _thread
+import asyncio
 import logging
 import random
 import time
@@ -10,6 +11,7 @@ import pwnagotchi
 import pwnagotchi.plugins as plugins
 import pwnagotchi.ui.faces as faces
 import pwnagotchi.ui.fonts as fonts
+import pwnagotchi.ui.textcache as textcache
 import pwnagotchi.ui.web as web
 import pwnagotchi.utils as utils
 from pwnagotchi.ui.components import *
@@ -27,11 +29,19 @@ class View(object):
 
         # setup faces from the configuration in case the user customized them
         faces.load_from_config(config['ui']['faces'])
+        textcache.setup(config)
 
         self._agent = None
-        self._render_cbs = []
+        # callback -> whether it takes the damaged regions too
+        self._render_cbs = {}
         self._config = config
+        # last frame handed to the callbacks
         self._canvas = None
+        # persistent canvas only the dirty regions are redrawn on, and the scratch one they're drawn on first
+        self._surface = None
+        self._scratch = None
+        # key -> box of the widget as it was last drawn, None if unknown
+        self._bboxes = {}
         self._frozen = False
         self._lock = Lock()
         self._voice = Voice(lang=config['main']['lang'])
@@ -113,9 +123,13 @@ class View(object):
     def on_state_change(self, key, cb):
         self._state.add_listener(key, cb)
 
-    def on_render(self, cb):
+    def on_render(self, cb, regions=False):
+        """
+        Registers cb(canvas) to be called for every new frame, or cb(canvas, regions) if regions is True,
+        regions being the list of (x0, y0, x1, y1) boxes that changed since the previous frame
+        """
         if cb not in self._render_cbs:
-            self._render_cbs.append(cb)
+            self._render_cbs[cb] = regions
 
     def _refresh_handler(self):
         delay = 1.0 / self._config['ui']['fps']
@@ -243,36 +257,49 @@ class View(object):
         self.set('status', self._voice.on_reading_logs(lines_so_far))
         self.update()
 
+    def _wait_step(self, step, secs, was_normal, sleeping):
+        # if we weren't in a normal state before going
+        # to sleep, keep that face and status on for
+        # a while, otherwise the sleep animation will
+        # always override any minor state change before it
+        if was_normal or step > 5:
+            if sleeping:
+                if secs > 1:
+                    self.set('face', faces.SLEEP)
+                    self.set('status', self._voice.on_napping(int(secs)))
+                else:
+                    self.set('face', faces.SLEEP2)
+                    self.set('status', self._voice.on_awakening())
+            else:
+                self.set('status', self._voice.on_waiting(int(secs)))
+                good_mood = self._agent.in_good_mood()
+                if step % 2 == 0:
+                    self.set('face', faces.LOOK_R_HAPPY if good_mood else faces.LOOK_R)
+                else:
+                    self.set('face', faces.LOOK_L_HAPPY if good_mood else faces.LOOK_L)
+
     def wait(self, secs, sleeping=True):
         was_normal = self.is_normal()
         part = secs / 10.0
 
         for step in range(0, 10):
-            # if we weren't in a normal state before going
-            # to sleep, keep that face and status on for
-            # a while, otherwise the sleep animation will
-            # always override any minor state change before it
-            if was_normal or step > 5:
-                if sleeping:
-                    if secs > 1:
-                        self.set('face', faces.SLEEP)
-                        self.set('status', self._voice.on_napping(int(secs)))
-                    else:
-                        self.set('face', faces.SLEEP2)
-                        self.set('status', self._voice.on_awakening())
-                else:
-                    self.set('status', self._voice.on_waiting(int(secs)))
-                    good_mood = self._agent.in_good_mood()
-                    if step % 2 == 0:
-                        self.set('face', faces.LOOK_R_HAPPY if good_mood else faces.LOOK_R)
-                    else:
-                        self.set('face', faces.LOOK_L_HAPPY if good_mood else faces.LOOK_L)
-
+            self._wait_step(step, secs, was_normal, sleeping)
             time.sleep(part)
             secs -= part
 
         self.on_normal()
 
+    async def wait_async(self, secs, sleeping=True):
+        was_normal = self.is_normal()
+        part = secs / 10.0
+
+        for step in range(0, 10):
+            self._wait_step(step, secs, was_normal, sleeping)
+            await asyncio.sleep(part)
+            secs -= part
+
+        self.on_normal()
+
     def on_shutdown(self):
         self.set('face', faces.SLEEP)
         self.set('status', self._voice.on_shutdown())
@@ -360,6 +387,54 @@ class View(object):
         self.set('status', self._voice.custom(text))
         self.update()
 
+    def _redraw(self, items, regions, boxes):
+        """
+        Redraws the widgets overlapping each region on the scratch canvas, in order, then copies them over
+        """
+        drawer = ImageDraw.Draw(self._scratch)
+        for region in regions:
+            drawer.rectangle((region[0], region[1], region[2] - 1, region[3] - 1), fill=WHITE)
+            for key, widget in items:
+                bbox = boxes.get(key)
+                if bbox is None or _intersect(bbox, region):
+                    widget.draw(self._scratch, drawer)
+            self._surface.paste(self._scratch.crop(region), region[:2])
+
+    def _render(self, force):
+        """
+        Brings the persistent canvas up to date and returns the list of regions that changed
+        """
+        full = (0, 0, self._width, self._height)
+        items = list(self._state.items())
+        if self._surface is None:
+            self._surface = Image.new('1', (self._width, self._height), WHITE)
+            self._scratch = Image.new('1', (self._width, self._height), WHITE)
+            force = True
+
+        drawer = ImageDraw.Draw(self._surface)
+        if force:
+            boxes = {key: widget.bbox(drawer) for key, widget in items}
+            damaged = [full]
+        else:
+            boxes = dict(self._bboxes)
+            damaged = []
+            widgets = dict(items)
+            for key in self._state.changes():
+                if key in boxes:
+                    damaged.append(boxes.pop(key))
+                if key in widgets:
+                    boxes[key] = widgets[key].bbox(drawer)
+                    damaged.append(boxes[key])
+                # a widget that can't tell where it draws could be anywhere
+                if None in damaged:
+                    damaged = [full]
+                    break
+            damaged = _merge([_clip(b, full) for b in damaged])
+
+        self._redraw(items, damaged, boxes)
+        self._bboxes = boxes
+        return damaged
+
     def update(self, force=False, new_data={}):
         for key, val in new_data.items():
             self.set(key, val)
@@ -371,17 +446,45 @@ class View(object):
             state = self._state
             changes = state.changes(ignore=self._ignore_changes)
             if force or len(changes):
-                self._canvas = Image.new('1', (self._width, self._height), WHITE)
-                drawer = ImageDraw.Draw(self._canvas)
-
                 plugins.on('ui_update', self)
 
-                for key, lv in state.items():
-                    lv.draw(self._canvas, drawer)
+                regions = self._render(force)
+                if regions:
+                    self._canvas = self._surface.copy()
 
-                web.update_frame(self._canvas)
+                    web.update_frame(self._canvas)
 
-                for cb in self._render_cbs:
-                    cb(self._canvas)
+                    for cb, with_regions in list(self._render_cbs.items()):
+                        if with_regions:
+                            cb(self._canvas, regions)
+                        else:
+                            cb(self._canvas)
 
                 self._state.reset()
+
+
+def _intersect(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _clip(bbox, bounds):
+    return max(bbox[0], bounds[0]), max(bbox[1], bounds[1]), min(bbox[2], bounds[2]), min(bbox[3], bounds[3])
+
+
+def _merge(boxes):
+    """
+    Merges the overlapping boxes and drops the empty ones
+    """
+    merged = []
+    for bbox in boxes:
+        if bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+            continue
+        i = 0
+        while i < len(merged):
+            if _intersect(merged[i], bbox):
+                bbox = union(merged.pop(i), bbox)
+                i = 0
+            else:
+                i += 1
+        merged.append(bbox)
+    return merged
@@ -1,15 +1,104 @@
+import io
 import os
-from threading import Lock
+import time
+from threading import Lock, Condition
 
 frame_path = '/var/tmp/pwnagotchi/pwnagotchi.png'
 frame_format = 'PNG'
 frame_ctype = 'image/png'
 frame_lock = Lock()
+# notified on every new frame, for the streams
+frame_changed = Condition(frame_lock)
+# notified whenever an encoding is done
+frame_encoded = Condition(frame_lock)
+
+# the latest canvas, bumped by every view update, is only encoded when somebody asks for it
+_frame = None
+_generation = 0
+# (generation, encoded bytes) of the last encoded frame
+_encoded = (0, None)
+# generation being encoded right now, 0 if none
+_encoding = 0
+# so that etags of a previous run can't match the ones of this one
+_run_id = '%x' % int(time.time())
 
 
 def update_frame(img):
-    global frame_lock, frame_path, frame_format
-    if not os.path.exists(os.path.dirname(frame_path)):
-        os.makedirs(os.path.dirname(frame_path))
+    """
+    Keeps the new canvas, the caller must not change it afterwards
+    """
+    global frame_lock, _frame, _generation
+    with frame_lock:
+        _frame = img
+        _generation += 1
+        frame_changed.notify_all()
+
+
+def frame_generation():
     with frame_lock:
-        img.save(frame_path, format=frame_format)
+        return _generation
+
+
+def wait_frame(generation, timeout=None):
+    """
+    Waits for a frame newer than generation, for at most timeout seconds, and returns the latest generation
+    """
+    with frame_changed:
+        frame_changed.wait_for(lambda: _generation > generation, timeout)
+        return _generation
+
+
+def frame_etag(generation):
+    return '%s-%d' % (_run_id, generation)
+
+
+def frame():
+    """
+    Returns the generation and the encoded bytes of the latest frame (None if there's none yet),
+    encoding it only if it changed since the last time it was asked for. Only one caller encodes
+    each generation, the others wait for it and get the same bytes.
+    """
+    global _encoded, _encoding
+    with frame_encoded:
+        while True:
+            generation, img = _generation, _frame
+            if img is None:
+                return generation, None
+            if _encoded[0] == generation:
+                return _encoded
+            if _encoding != generation:
+                break
+            frame_encoded.wait()
+        _encoding = generation
+
+    # encode outside of the lock, view updates must not wait for http clients
+    encoded = None
+    try:
+        buf = io.BytesIO()
+        img.save(buf, format=frame_format)
+        encoded = (generation, buf.getvalue())
+    finally:
+        with frame_encoded:
+            if encoded is not None and _encoded[0] < generation:
+                _encoded = encoded
+            if _encoding == generation:
+                _encoding = 0
+            frame_encoded.notify_all()
+    return encoded
+
+
+def save_frame(path=None):
+    """
+    Writes the latest frame to path (frame_path by default), for the ui.web.on_frame command
+    """
+    path = path or frame_path
+    _, data = frame()
+    if data is None:
+        return
+
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    temp = "%s.tmp" % path
+    with open(temp, 'wb') as fp:
+        fp.write(data)
+    os.replace(temp, path)
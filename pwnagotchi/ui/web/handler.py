@@ -15,7 +15,6 @@ import pwnagotchi.grid as grid
 import pwnagotchi.ui.web as web
 from pwnagotchi import plugins
 
-from flask import send_file
 from flask import Response
 from flask import request
 from flask import jsonify
@@ -23,6 +22,9 @@ from flask import abort
 from flask import redirect
 from flask import render_template, render_template_string
 
+# seconds after which the current frame is sent again on the streams, so that dead clients are noticed
+STREAM_KEEPALIVE = 30.0
+
 
 class Handler:
     def __init__(self, config, agent, app):
@@ -32,6 +34,7 @@ class Handler:
 
         self._app.add_url_rule('/', 'index', self.with_auth(self.index))
         self._app.add_url_rule('/ui', 'ui', self.with_auth(self.ui))
+        self._app.add_url_rule('/ui/stream', 'ui_stream', self.with_auth(self.ui_stream))
 
         self._app.add_url_rule('/shutdown', 'shutdown', self.with_auth(self.shutdown), methods=['POST'])
         self._app.add_url_rule('/reboot', 'reboot', self.with_auth(self.reboot), methods=['POST'])
@@ -222,7 +225,37 @@ class Handler:
         finally:
             _thread.start_new_thread(pwnagotchi.restart, (mode,))
 
-    # serve the PNG file with the display image
+    # serve the PNG with the display image, encoded only if it changed since the last request
     def ui(self):
-        with web.frame_lock:
-            return send_file(web.frame_path, mimetype='image/png')
+        generation, data = web.frame()
+        if data is None:
+            abort(404)
+
+        response = Response(data, mimetype=web.frame_ctype)
+        response.set_etag(web.frame_etag(generation))
+        # always revalidate, the browser gets a 304 until the display changes
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    # push the display image every time it changes, as a multipart stream of PNGs every viewer shares
+    def ui_stream(self):
+        def stream():
+            last = sent = dropped = 0
+            try:
+                while True:
+                    web.wait_frame(last, timeout=STREAM_KEEPALIVE)
+                    # a viewer slower than the display only gets the latest frame, the ones in between are dropped
+                    generation, data = web.frame()
+                    if data is None:
+                        continue
+                    if last:
+                        dropped += max(generation - last - 1, 0)
+                    last = generation
+                    sent += 1
+                    yield b'--frame\r\nContent-Type: ' + web.frame_ctype.encode() + \
+                          b'\r\nContent-Length: ' + str(len(data)).encode() + b'\r\n\r\n' + data + b'\r\n'
+            finally:
+                logging.debug("ui stream closed: %d frames sent, %d dropped" % (sent, dropped))
+
+        return Response(stream(), mimetype='multipart/x-mixed-replace; boundary=frame',
+                        headers={'Cache-Control': 'no-cache'})
@@ -16,6 +16,9 @@ from zipfile import ZipFile
 from datetime import datetime
 from enum import Enum
 
+import pwnagotchi.handshakes as handshakes
+import pwnagotchi.whitelist as whitelist
+
 
 class DottedTomlEncoder(TomlEncoder):
     """
@@ -74,26 +77,7 @@ def remove_whitelisted(list_of_handshakes, list_of_whitelisted_strings, valid_on
     """
     Removes a given list of whitelisted handshakes from a path list
     """
-    filtered = list()
-    def normalize(name):
-        """
-        Only allow alpha/nums
-        """
-        return str.lower(''.join(c for c in name if c.isalnum()))
-
-    for handshake in list_of_handshakes:
-        try:
-            normalized_handshake = normalize(os.path.basename(handshake).rstrip('.pcap'))
-            for whitelist in list_of_whitelisted_strings:
-                normalized_whitelist = normalize(whitelist)
-                if normalized_whitelist in normalized_handshake:
-                    break
-            else:
-                filtered.append(handshake)
-        except Exception:
-            if valid_on_error:
-                filtered.append(handshake)
-    return filtered
+    return whitelist.compiled(list_of_whitelisted_strings).remove_from(list_of_handshakes, valid_on_error)
 
 
 
@@ -301,8 +285,7 @@ def secs_to_hhmmss(secs):
 
 
 def total_unique_handshakes(path):
-    expr = os.path.join(path, "*.pcap")
-    return len(glob.glob(expr))
+    return handshakes.catalog(path).count()
 
 
 def iface_channels(ifname):
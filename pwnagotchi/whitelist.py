@@ -0,0 +1,91 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+MAX_CACHED = 16
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def normalize(name):
+    """
+    Only allow alpha/nums
+    """
+    return str.lower(''.join(c for c in name if c.isalnum()))
+
+
+class Whitelist(object):
+    """
+    A whitelist compiled once into set lookups for hostnames, MACs and OUI prefixes and into
+    a single regular expression for the substring matching done on handshake filenames.
+    """
+
+    def __init__(self, entries, filter_expr=None):
+        self.entries = tuple(entries)
+        # original entries, matched against hostnames, lowercase macs and lowercase ouis
+        self._names = frozenset(self.entries)
+        self._filter = re.compile(filter_expr) if filter_expr else None
+        normalized = sorted(set(map(normalize, self.entries)), key=len, reverse=True)
+        self._files = re.compile('|'.join(map(re.escape, normalized))) if normalized else None
+
+    def is_whitelisted(self, ap):
+        names = self._names
+        mac = ap['mac'].lower()
+        return ap['hostname'] in names or mac in names or mac[:8] in names
+
+    def is_included(self, ap):
+        return self._filter is None or \
+               self._filter.match(ap['hostname']) is not None or \
+               self._filter.match(ap['mac']) is not None
+
+    def filter_aps(self, aps):
+        """
+        Returns the encrypted access points that are not whitelisted and match the filter, if any
+        """
+        names = self._names
+        included = self.is_included
+        filtered = []
+        for ap in aps:
+            if ap['encryption'] == '' or ap['encryption'] == 'OPEN':
+                continue
+            mac = ap['mac'].lower()
+            if ap['hostname'] in names or mac in names or mac[:8] in names:
+                continue
+            if included(ap):
+                filtered.append(ap)
+        return filtered
+
+    def remove_from(self, list_of_handshakes, valid_on_error=True):
+        """
+        Removes the whitelisted handshakes from a path list
+        """
+        if self._files is None:
+            return list(list_of_handshakes)
+
+        search = self._files.search
+        filtered = list()
+        for handshake in list_of_handshakes:
+            try:
+                if search(normalize(os.path.basename(handshake).rstrip('.pcap'))) is None:
+                    filtered.append(handshake)
+            except Exception:
+                if valid_on_error:
+                    filtered.append(handshake)
+        return filtered
+
+
+def compiled(entries, filter_expr=None):
+    """
+    Returns the compiled version of entries, only compiling it again when its content changes
+    """
+    key = (tuple(entries), filter_expr or None)
+    with _cache_lock:
+        wl = _cache.pop(key, None)
+        if wl is None:
+            wl = Whitelist(key[0], key[1])
+        _cache[key] = wl
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return wl
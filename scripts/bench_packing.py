@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.insert(0,
+                os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '../'))
+
+from PIL import Image, ImageDraw
+
+import pwnagotchi.ui.hw.libs.packing as packing
+
+
+# the per pixel loops the drivers used to have
+
+def old_rows(image, width, height):
+    # waveshare v1 2.13bc and fast, 2.13bc, 2.13d, 2.7, 2.9 and 1.54 (which only takes portrait images)
+    buf = [0xFF] * (int(width / 8) * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    buf[int((x + y * width) / 8)] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    buf[int((newx + newy * width) / 8)] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def old_padded_rows(image, width, height):
+    # waveshare v1 2.13
+    linewidth = width // 8 if width % 8 == 0 else width // 8 + 1
+    buf = [0xFF] * (linewidth * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    buf[int(x / 8) + y * linewidth] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    buf[int(newx / 8) + newy * linewidth] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def old_mirrored_rows(image, width, height):
+    # waveshare v2 and dfrobot v1 / v2
+    linewidth = width // 8 if width % 8 == 0 else width // 8 + 1
+    buf = [0xFF] * (linewidth * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    x = imwidth - x
+                    buf[x // 8 + y * linewidth] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    newy = imwidth - newy - 1
+                    buf[newx // 8 + newy * linewidth] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def old_pages(image, width, height):
+    # waveshare oled hat (SH1106)
+    buf = [0xFF] * ((width // 8) * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    buf[x + (y // 8) * width] &= ~(1 << (y % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    buf[(newx + (newy // 8) * width)] &= ~(1 << (y % 8))
+    return buf
+
+
+# (old, new, width, height) of every panel
+PANELS = {
+    'waveshare_1 2.13': (old_padded_rows, packing.rows, 122, 250),
+    'waveshare_1 2.13bc': (old_rows, packing.rows, 104, 212),
+    'waveshare_2': (old_mirrored_rows, packing.mirrored_rows, 122, 250),
+    'waveshare154inch': (old_rows, packing.rows, 200, 200),
+    'waveshare213bc/d': (old_rows, packing.rows, 104, 212),
+    'waveshare27inch': (old_rows, packing.rows, 176, 264),
+    'waveshare29inch': (old_rows, packing.rows, 128, 296),
+    'dfrobot': (old_mirrored_rows, packing.mirrored_rows, 122, 250),
+    'oledhat': (old_pages, packing.pages, 128, 64),
+}
+
+
+def random_image(size, mode):
+    image = Image.new('1', size, 255)
+    drawer = ImageDraw.Draw(image)
+    for _ in range(20):
+        x, y = random.randrange(size[0]), random.randrange(size[1])
+        drawer.rectangle((x, y, x + random.randint(0, 40), y + random.randint(0, 20)), fill=random.choice((0, 255)))
+        drawer.text((random.randrange(size[0]), random.randrange(size[1])), 'pwnagotchi (◕‿‿◕)', fill=0)
+    # some noise so that every bit gets tested
+    for _ in range(size[0] * size[1] // 10):
+        image.putpixel((random.randrange(size[0]), random.randrange(size[1])), random.choice((0, 255)))
+    return image.convert(mode)
+
+
+def timeit(fn, *args, runs=10):
+    started = time.time()
+    for _ in range(runs):
+        result = fn(*args)
+    return (time.time() - started) / runs * 1000.0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the vectorized framebuffer packing with the old per pixel loops.")
+    parser.add_argument('--images', type=int, default=10, help='Random images per panel and orientation')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per timing')
+    args = parser.parse_args()
+
+    random.seed(0)
+    failed = 0
+    for name, (old, new, width, height) in PANELS.items():
+        for orientation, size in (('portrait', (width, height)), ('landscape', (height, width)), ('wrong size', (10, 10))):
+            old_ms = new_ms = 0.0
+            for i in range(args.images):
+                # the canvas is '1', but the drivers also get converted images
+                image = random_image(size, '1' if i % 2 == 0 else 'L')
+                ms, old_buf = timeit(old, image, width, height, runs=args.runs)
+                old_ms += ms / args.images
+                ms, new_buf = timeit(new, image, width, height, runs=args.runs)
+                new_ms += ms / args.images
+                if bytes(old_buf) != bytes(new_buf):
+                    failed += 1
+                    print("%s %s: image %d differs" % (name, orientation, i))
+
+            print("%-20s %-10s old=%8.2fms new=%6.2fms (x%.1f)" %
+                  (name, orientation, old_ms, new_ms, old_ms / max(new_ms, 1e-6)))
+
+    if failed:
+        print("%d buffers differ!" % failed)
+        sys.exit(1)
+    print("all buffers are identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import logging
+import argparse
+
+import toml
+
+sys.path.insert(0,
+                os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '../'))
+
+from pwnagotchi.ai.sim import Simulator, run
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs pwnagotchi.ai.gym.Environment on the WiFi simulator.')
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                                         '../pwnagotchi/defaults.toml'))
+    parser.add_argument('--epochs', type=int, default=5000)
+    parser.add_argument('--aps', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Epoch.next logs every epoch at info level
+    logging.basicConfig(level=logging.WARNING)
+
+    config = toml.load(args.config)
+    sim = Simulator(config, num_aps=args.aps, seed=args.seed)
+    env = sim.environment()
+    env.action_space.seed(args.seed)
+
+    start = time.time()
+    rewards = run(env, args.epochs)
+    elapsed = time.time() - start
+
+    print("%d epochs in %.2fs (%.0f epochs/s)" % (len(rewards), elapsed, len(rewards) / elapsed))
+    # epochs with misses and no interactions at all get a huge negative reward, the median is more telling
+    rewards.sort()
+    print("reward: median=%.4f min=%.4f max=%.4f" % (rewards[len(rewards) // 2], rewards[0], rewards[-1]))
+
+
+if __name__ == '__main__':
+    main()
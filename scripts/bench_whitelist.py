@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.insert(0,
+                os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             '../'))
+
+from pwnagotchi.whitelist import Whitelist
+
+
+def random_mac():
+    return ':'.join('%02x' % random.randint(0, 255) for _ in range(6))
+
+
+def old_filter_aps(aps, whitelist):
+    aps_out = []
+    for ap in aps:
+        if ap['encryption'] == '' or ap['encryption'] == 'OPEN':
+            continue
+        elif ap['hostname'] not in whitelist \
+                and ap['mac'].lower() not in whitelist \
+                and ap['mac'][:8].lower() not in whitelist:
+            aps_out.append(ap)
+    return aps_out
+
+
+def old_remove_whitelisted(list_of_handshakes, list_of_whitelisted_strings):
+    filtered = list()
+
+    def normalize(name):
+        return str.lower(''.join(c for c in name if c.isalnum()))
+
+    for handshake in list_of_handshakes:
+        normalized_handshake = normalize(os.path.basename(handshake).rstrip('.pcap'))
+        for whitelist in list_of_whitelisted_strings:
+            normalized_whitelist = normalize(whitelist)
+            if normalized_whitelist in normalized_handshake:
+                break
+        else:
+            filtered.append(handshake)
+    return filtered
+
+
+def timeit(fn, *args, runs=10):
+    started = time.time()
+    for _ in range(runs):
+        result = fn(*args)
+    return (time.time() - started) / runs * 1000.0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the compiled whitelist with the old list scans.")
+    parser.add_argument('--aps', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--entries', type=int, nargs='+', default=[10, 100, 500])
+    args = parser.parse_args()
+
+    random.seed(0)
+    for num_entries in args.entries:
+        entries = ['network-%d' % i for i in range(num_entries // 2)] + \
+                  [random_mac() for _ in range(num_entries // 4)] + \
+                  [random_mac()[:8] for _ in range(num_entries - num_entries // 2 - num_entries // 4)]
+        wl = Whitelist(entries)
+
+        for num_aps in args.aps:
+            aps = [{
+                'hostname': random.choice(entries) if random.random() < 0.05 else 'ap-%d' % i,
+                'mac': random_mac(),
+                'encryption': random.choice(('WPA2', 'WPA2', 'OPEN'))
+            } for i in range(num_aps)]
+            pcaps = ['/root/handshakes/%s_%s.pcap' % (ap['hostname'], ap['mac'].replace(':', '')) for ap in aps]
+
+            old_ms, old = timeit(old_filter_aps, aps, entries)
+            new_ms, new = timeit(wl.filter_aps, aps)
+            assert old == new
+            print("aps=%-5d entries=%-4d  filter_aps:         old=%8.2fms new=%8.2fms (x%.1f)" %
+                  (num_aps, num_entries, old_ms, new_ms, old_ms / max(new_ms, 1e-6)))
+
+            old_ms, old = timeit(old_remove_whitelisted, pcaps, entries, runs=1)
+            new_ms, new = timeit(wl.remove_from, pcaps, runs=1)
+            assert old == new
+            print("aps=%-5d entries=%-4d  remove_whitelisted: old=%8.2fms new=%8.2fms (x%.1f)" %
+                  (num_aps, num_entries, old_ms, new_ms, old_ms / max(new_ms, 1e-6)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import websockets
+
+from pwnagotchi.agent import Agent
+from pwnagotchi.bettercap import Client
+
+# how long the fake bettercap takes to answer and the agent takes to handle things
+SESSION_DELAY = 0.2
+BLOCKING_DELAY = 0.2
+EVENTS = ['wifi.ap.new', 'wifi.client.new', 'wifi.client.handshake']
+
+
+class FakeBettercapHandler(BaseHTTPRequestHandler):
+    def _reply(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(SESSION_DELAY)
+        self._reply({'wifi': {'aps': []}, 'modules': []})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply({'success': True})
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBettercap(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+async def send_events(ws, path):
+    for tag in EVENTS:
+        await ws.send(json.dumps({'tag': tag, 'data': {}}))
+    await ws.wait_closed()
+
+
+class FakeAgent(Client):
+    """
+    Just the bits of the agent the async loop needs, with the blocking parts replaced by sleeps
+    """
+    aio = Agent.aio
+    _fetch_stats_async = Agent._fetch_stats_async
+    _poll_events_async = Agent._poll_events_async
+
+    def __init__(self, port, ws_port):
+        super().__init__('127.0.0.1', 'http', port, session_max_age=0.0)
+        self.websocket = "ws://user:pass@127.0.0.1:%d/api" % ws_port
+        self._aio = None
+        self.stats = 0
+        self.events = []
+
+    def _update_stats(self, s):
+        time.sleep(BLOCKING_DELAY)
+        self.stats += 1
+
+    def _handle_event(self, jmsg):
+        time.sleep(BLOCKING_DELAY)
+        self.events.append(jmsg['tag'])
+
+
+def test_blocking_work_does_not_stall_the_loop():
+    server = FakeBettercap(('127.0.0.1', 0), FakeBettercapHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    ws_server = loop.run_until_complete(websockets.serve(send_events, '127.0.0.1', 0))
+    ws_port = ws_server.sockets[0].getsockname()[1]
+
+    agent = FakeAgent(server.server_address[1], ws_port)
+    gaps = []
+
+    async def ticker():
+        last = time.time()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.time()
+            gaps.append(now - last)
+            last = now
+
+    async def scenario():
+        tasks = [loop.create_task(coro) for coro in
+                 (ticker(), agent._fetch_stats_async(), agent._poll_events_async())]
+        await asyncio.sleep(1.5)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        loop.run_until_complete(scenario())
+    finally:
+        ws_server.close()
+        loop.run_until_complete(ws_server.wait_closed())
+        agent.aio().shutdown()
+        server.shutdown()
+        loop.close()
+
+    # events are handled one at a time and in order
+    assert agent.events == EVENTS
+    assert agent.stats >= 1
+    # none of the session fetches, stats updates or event handlers blocked the loop
+    assert max(gaps) < BLOCKING_DELAY / 2
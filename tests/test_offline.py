@@ -0,0 +1,48 @@
+import numpy as np
+
+from pwnagotchi.ai.offline import ReplayEnvironment
+from pwnagotchi.ai.replay import Transition
+
+GOOD, BAD = 0, 1
+
+
+def replay_log(num_good, num_bad):
+    # same situation every time, the policy that worked is the least frequent one
+    observation = np.full(4, 0.5, dtype=np.float32)
+    transitions = [Transition(i, observation, np.array([GOOD]), 1.0) for i in range(num_good)] + \
+                  [Transition(i, observation, np.array([BAD]), -0.5) for i in range(num_bad)]
+    np.random.RandomState(0).shuffle(transitions)
+    return transitions
+
+
+def train_bandit(env, steps=5000, lr=0.05, seed=0):
+    """
+    Plain policy gradient on a softmax over the actions, returns the final probabilities
+    """
+    rnd = np.random.RandomState(seed)
+    logits = np.zeros(env.action_space.nvec[0])
+    env.reset()
+    for _ in range(steps):
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        action = rnd.choice(len(probs), p=probs)
+        _, reward, _, _ = env.step([action])
+        grad = -probs
+        grad[action] += 1.0
+        logits += lr * reward * grad
+    probs = np.exp(logits - logits.max())
+    return probs / probs.sum()
+
+
+def test_policy_moves_towards_high_reward_actions():
+    env = ReplayEnvironment([2], replay_log(num_good=20, num_bad=80))
+    probs = train_bandit(env)
+    # plain imitation would end up on the most frequent (bad) policy
+    assert probs[GOOD] > 0.9
+
+
+def test_unmatched_policies_are_neutral():
+    # a third action that was never logged
+    env = ReplayEnvironment([3], replay_log(num_good=1, num_bad=1))
+    rewards = [env.step([2])[1] for _ in range(2)]
+    assert rewards == [0.0, 0.0]